@@ -0,0 +1,397 @@
+# benchmarks/run_benchmarks.py
+# Headless benchmarks for every page, driven by streamlit.testing AppTest.
+#
+# Each run copies the app into a temporary workspace, seeds synthetic data
+# (expense/savings ledgers for the Financial Dashboard, a meal history for
+# the Health Tracker, a generator dataset for the generators chart), then
+# scripts a few interactions per page. For each interaction it records the
+# rerun wall time, peak Python memory, bytes written, the number of widgets
+# on the page and the profiler's per-stage times, and writes everything to
+# a JSON file that can be diffed between commits (plus, optionally, the raw
+# profiler records as JSONL).
+#
+# The volleyball page also gets a viewer fan-out run without AppTest: one
+# scorer plays a match while N viewer subscriptions poll the live channel
+# after every point (what N scoreboard fragments do), timing publish, poll
+# with and without news, and the size of what each viewer receives.
+#
+#   python benchmarks/run_benchmarks.py                      # 1k, 100k, 1M rows
+#   python benchmarks/run_benchmarks.py --sizes 1000 --output bench.json
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.element_tree import Widget  # noqa: E402
+
+from services import profiler  # noqa: E402
+from services.ledger import EXPENSE_COLUMNS, SAVINGS_COLUMNS, Ledger  # noqa: E402
+from services.match_log import MatchStore  # noqa: E402
+from services.pubsub import Channel  # noqa: E402
+
+PAGES = {
+    'health': 'pages/page-01_Vaishnav Pasarge.py',
+    'generators': 'pages/page-02_Devesh_Kushwaha.py',
+    'horoscope': 'pages/page-03_Suryansh_Singh.py',
+    'volleyball': 'pages/page-04_Ram_satish.py',
+    'finance': 'pages/page-05_Vansh_Seth.py',
+}
+
+CATEGORIES = ['Food', 'Transport', 'Entertainment', 'Utilities', 'Debts', 'Other']
+INVESTMENT_TYPES = ['FD', 'Savings Account', 'Stocks', 'Crypto', 'Bonds', 'Real Estate']
+
+# ----------- Workspace & seeding -------------
+
+def make_workspace():
+    # copy of the pages, so seeded data never touches the real data files
+    # (services are imported from the repo itself)
+    workspace = tempfile.mkdtemp(prefix='multipage-bench-')
+    for name in ('streamlit_app.py', 'pages'):
+        src = os.path.join(REPO_DIR, name)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(workspace, name),
+                            ignore=shutil.ignore_patterns('__pycache__', '*.db*', 'tenants'))
+        else:
+            shutil.copy(src, workspace)
+    return workspace
+
+
+def _random_dates(rng, n, years=5):
+    start = date.today() - timedelta(days=365 * years)
+    return [str(start + timedelta(days=rng.randrange(365 * years))) for _ in range(n)]
+
+
+def seed_finance(workspace, rows, chunk=50_000):
+    db_path = os.path.join(workspace, 'pages', 'finance.db')
+    Ledger(db_path).close()  # creates the schema
+    rng = random.Random(rows)
+    conn = sqlite3.connect(db_path)
+    done = 0
+    while done < rows:
+        n = min(chunk, rows - done)
+        conn.executemany(
+            f"INSERT INTO expenses ({', '.join(EXPENSE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            [(d, rng.choice(CATEGORIES), '', round(rng.uniform(1, 5000), 2), f"note {done + i}",
+              'Paid' if rng.random() < 0.7 else 'Pending')
+             for i, d in enumerate(_random_dates(rng, n))],
+        )
+        savings_n = max(1, n // 10)
+        conn.executemany(
+            f"INSERT INTO savings ({', '.join(SAVINGS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            [(d, rng.choice(INVESTMENT_TYPES), round(rng.uniform(100, 100_000), 2), '', '', '')
+             for d in _random_dates(rng, savings_n)],
+        )
+        conn.commit()
+        done += n
+    conn.close()
+    ledger = Ledger(db_path)
+    ledger.rebuild_aggregates()
+    ledger.close()
+
+
+def seed_meals(workspace, meals, days=365):
+    # writes the day partitions and rollups of the calorie log directly
+    data_dir = os.path.join(workspace, 'calories')
+    os.makedirs(os.path.join(data_dir, 'days'), exist_ok=True)
+    rng = random.Random(meals)
+    per_day = {}
+    for i in range(meals):
+        day = str(date.today() - timedelta(days=rng.randrange(days)))
+        per_day.setdefault(day, []).append({'meal': f"meal {i}", 'calories': rng.randrange(50, 900), 'ts': None})
+    seq = 0
+    for day, entries in per_day.items():
+        seq += 1
+        with open(os.path.join(data_dir, 'days', f"{day}.json"), 'w') as f:
+            json.dump({'entries': entries, 'seq': seq}, f)
+    rollups = {day: sum(e['calories'] for e in entries) for day, entries in per_day.items()}
+    with open(os.path.join(data_dir, 'rollups.json'), 'w') as f:
+        json.dump({'seq': seq, 'totals': rollups}, f)
+
+
+def seed_generators(workspace, generators):
+    # the keyed generator dataset (services/generator_store.py)
+    rng = random.Random(generators)
+    entries = {f"gen-{i}": [f"Gen-{i}", round(rng.paretovariate(1.5), 1)] for i in range(generators)}
+    with open(os.path.join(workspace, 'generators.json'), 'w') as f:
+        json.dump(entries, f)
+
+# ----------- Measuring -------------
+
+def _bytes_written():
+    # characters written by this process (Linux); None elsewhere
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def count_widgets(node):
+    if isinstance(node, Widget):
+        return 1
+    return sum(count_widgets(child) for child in getattr(node, 'children', {}).values())
+
+
+def stage_seconds(since):
+    # {stage: seconds} from the profiler records after `since`
+    stages = {}
+    for r in profiler.records(since):
+        stages[r['stage']] = round(stages.get(r['stage'], 0) + r['seconds'], 4)
+    return stages
+
+
+def measure(at, action, track_memory=True):
+    written = _bytes_written()
+    since = profiler.last_seq()
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    action(at)
+    elapsed = time.perf_counter() - started
+    peak = None
+    if track_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    after = _bytes_written()
+    if at.exception:
+        raise RuntimeError(f"page raised: {at.exception[0].value}")
+    return {
+        'rerun_s': round(elapsed, 4),
+        'peak_mem_bytes': peak,
+        'bytes_written': after - written if written is not None else None,
+        'widgets': count_widgets(at._tree),
+        'stages': stage_seconds(since),
+    }
+
+# ----------- Interactions -------------
+
+def _by_label(elements, label):
+    return next(e for e in elements if e.label == label)
+
+
+def run_page(at):
+    at.run()
+
+
+def add_expense(at):
+    # by key: the recurring-expense form above has an "Amount" box too
+    at.number_input(key='e_amount').set_value(42.5)
+    _by_label(at.button, 'Add Expense').click()
+    at.run()
+
+
+def edit_expense_row(at):
+    amount = next(w for w in at.number_input if w.key and w.key.startswith('exp_amt_'))
+    amount.set_value(amount.value + 1)
+    _by_label(at.button, 'Stage changes').click()
+    at.run()
+    _by_label(at.button, '💾 Apply changes').click()
+    at.run()
+
+
+def change_expense_filters(at):
+    _by_label(at.selectbox, 'Status').set_value('Pending')
+    at.run()
+
+
+def add_meal(at):
+    _by_label(at.text_input, 'Meal / Food Item').set_value('Porridge')
+    _by_label(at.number_input, 'Calories').set_value(350)
+    _by_label(at.button, 'Add').click()
+    at.run()
+
+
+def add_generator(at):
+    _by_label(at.text_input, 'Static-site generator (name)').set_value('Hugo')
+    _by_label(at.number_input, 'GitHub stars (×1 000)').set_value(75.0)
+    _by_label(at.button, 'Add to chart').click()
+    at.run()
+
+
+def tell_future(at):
+    _by_label(at.button, 'Tell My Future!').click()
+    at.run()
+
+
+def score_point(at):
+    _by_label(at.button, 'Point: Team A').click()
+    at.run()
+
+
+def undo_point(at):
+    _by_label(at.button, 'Undo last point').click()
+    at.run()
+
+
+# page -> [(scenario name, action)]; the first entry is the cold first render
+SCENARIOS = {
+    'finance': [('first_render', run_page), ('add_expense', add_expense),
+                ('edit_row', edit_expense_row), ('change_filters', change_expense_filters)],
+    'health': [('first_render', run_page), ('add_meal', add_meal)],
+    'generators': [('first_render', run_page), ('add_generator', add_generator)],
+    'horoscope': [('first_render', run_page), ('tell_future', tell_future)],
+    'volleyball': [('first_render', run_page), ('score_point', score_point), ('undo_point', undo_point)],
+}
+
+# ----------- Runner -------------
+
+def _run_scenarios(page, workspace, timeout, track_memory):
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    os.chdir(workspace)
+    at = AppTest.from_file(os.path.join(workspace, PAGES[page]), default_timeout=timeout)
+    return [(scenario, measure(at, action, track_memory)) for scenario, action in SCENARIOS[page]]
+
+
+def bench_page(page, seeded, label, timeout, track_memory):
+    # Timings come from a pass without tracemalloc (it slows Python down a
+    # lot); peak memory from a second pass over a fresh copy of the data.
+    workspace = seeded + '-run'
+    shutil.copytree(seeded, workspace)
+    timed = _run_scenarios(page, workspace, timeout, track_memory=False)
+    shutil.rmtree(workspace, ignore_errors=True)
+
+    peaks = {}
+    if track_memory:
+        shutil.copytree(seeded, workspace)
+        peaks = {scenario: m['peak_mem_bytes'] for scenario, m in _run_scenarios(page, workspace, timeout, True)}
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    results = []
+    for scenario, metrics in timed:
+        result = {'page': page, 'scenario': scenario, 'data': label, **metrics,
+                  'peak_mem_bytes': peaks.get(scenario)}
+        print(f"{page:<11} {label:<14} {scenario:<15} {result['rerun_s']:>8.3f}s  "
+              f"widgets={result['widgets']}", flush=True)
+        results.append(result)
+    return results
+
+
+def bench_fanout(viewers, points=300):
+    # one scorer, `viewers` subscriptions polled after every point
+    workspace = tempfile.mkdtemp(prefix='multipage-fanout-')
+    store = MatchStore(workspace, Channel())
+    match = store.create('Team A', 'Team B')
+    subs = [store.subscribe(match.id) for _ in range(viewers)]
+    for sub in subs:
+        sub.poll()   # initial full state
+    rng = random.Random(viewers)
+    publish_s = poll_s = idle_s = 0.0
+    delta_bytes = deliveries = played = 0
+    for _ in range(points):
+        if match.winner is not None:
+            break
+        started = time.perf_counter()
+        store.point(match, int(rng.random() < 0.5))
+        publish_s += time.perf_counter() - started
+        started = time.perf_counter()
+        changes = [sub.poll() for sub in subs]
+        poll_s += time.perf_counter() - started
+        started = time.perf_counter()
+        for sub in subs:
+            sub.poll()   # nothing new
+        idle_s += time.perf_counter() - started
+        deliveries += sum(c is not None for c in changes)
+        delta_bytes += len(json.dumps(changes[0]))
+        played += 1
+    state_bytes = len(json.dumps(store.channel.state(match.id)))
+    shutil.rmtree(workspace, ignore_errors=True)
+    result = {
+        'page': 'volleyball', 'scenario': 'viewer_fanout', 'data': f"{viewers} viewers", 'points': played,
+        'publish_us': round(publish_s / played * 1e6, 1),
+        'poll_changed_us': round(poll_s / (played * viewers) * 1e6, 2),
+        'poll_idle_us': round(idle_s / (played * viewers) * 1e6, 2),
+        'deliveries_per_s': round(deliveries / poll_s),
+        'delta_bytes': round(delta_bytes / played, 1),
+        'state_bytes': state_bytes,
+    }
+    print(f"{'volleyball':<11} {result['data']:<14} {'viewer_fanout':<15} "
+          f"{result['deliveries_per_s']:>8} deliveries/s  delta={result['delta_bytes']}B "
+          f"of {state_bytes}B", flush=True)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless benchmarks for every page.')
+    parser.add_argument('--sizes', default='1000,100000,1000000',
+                        help='comma separated expense ledger sizes for the Financial Dashboard')
+    parser.add_argument('--meals', type=int, default=100_000, help='meals seeded for the Health Tracker')
+    parser.add_argument('--generators', type=int, default=10_000, help='entries seeded for the generators chart')
+    parser.add_argument('--viewers', default='10,100,1000',
+                        help='comma separated viewer counts for the volleyball fan-out run')
+    parser.add_argument('--pages', default=','.join(PAGES), help='comma separated pages to run')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds allowed per rerun')
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass (no peak memory)')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--profile-output', help='also write the raw profiler records (JSONL) here')
+    args = parser.parse_args(argv)
+
+    pages = args.pages.split(',')
+    results = []
+    cwd = os.getcwd()
+    try:
+        for page in pages:
+            runs = [('-', None)]
+            if page == 'finance':
+                runs = [(f"{size} rows", size) for size in (int(s) for s in args.sizes.split(','))]
+            elif page == 'health':
+                runs = [(f"{args.meals} meals", args.meals)]
+            elif page == 'generators':
+                runs = [(f"{args.generators} generators", args.generators)]
+            for label, size in runs:
+                workspace = make_workspace()
+                if page == 'finance':
+                    seed_finance(workspace, size)
+                elif page == 'health':
+                    seed_meals(workspace, size)
+                elif page == 'generators':
+                    seed_generators(workspace, size)
+                results += bench_page(page, workspace, label, args.timeout, not args.no_memory)
+                shutil.rmtree(workspace, ignore_errors=True)
+            if page == 'volleyball':
+                results += [bench_fanout(int(n)) for n in args.viewers.split(',')]
+    finally:
+        os.chdir(cwd)
+
+    report = {
+        'commit': _git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'streamlit': st.__version__,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+    if args.profile_output:
+        with open(args.profile_output, 'w') as f:
+            f.write(profiler.jsonl_text())
+        print(f"wrote {args.profile_output}")
+
+
+if __name__ == '__main__':
+    main()
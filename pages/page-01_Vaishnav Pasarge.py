@@ -1,20 +1,43 @@
 import streamlit as st
-import json
 import os
+from datetime import date, timedelta
 
-DATA_FILE = "calories_data.json"
+from services import bmi as bmi_service
+from services.calorie_log import CalorieLog
+from services.profiler import profiled, profiler_panel, stage
+from services.startup import PageTimer, lazy_import, warm_up
+from services.tenants import DEFAULT_TENANT, TenantRegistry, current_tenant, tenant_dir
 
-def load_calories():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return []
+timer = PageTimer("Health Tracker")
+warm_up()
+pd = lazy_import('pandas', "Health Tracker")  # only needed for the trend chart
+st.set_page_config(page_title="Health Tracker", page_icon="🍎")
 
-def save_calories(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+DATA_FILE = "calories_data.json"  # old single-file store, imported once
+CALORIES_DIR = "calories"
 
-st.set_page_config(page_title="Health Tracker", page_icon="🍎")
+def open_calorie_log(tenant):
+    # one calorie log per tenant, partitioned by day
+    legacy_path = DATA_FILE if tenant == DEFAULT_TENANT else None
+    return CalorieLog(os.path.join(tenant_dir(".", tenant), CALORIES_DIR), legacy_path=legacy_path)
+
+@st.cache_resource
+def calorie_registry():
+    return TenantRegistry(open_calorie_log)
+
+@profiled("load")
+def load_calories():
+    return calorie_registry().get(current_tenant())
+
+@profiled("filter")
+def calorie_trend(rollups, days, freq):
+    # daily totals of the last `days` days (missing days count as 0), summed per `freq`
+    end = date.today()
+    index = pd.date_range(end - timedelta(days=days - 1), end, freq="D")
+    daily = pd.Series(rollups, dtype="float64")
+    daily.index = pd.to_datetime(daily.index)
+    daily = daily.reindex(index, fill_value=0)
+    return daily.resample(freq).sum() if freq != "D" else daily
 
 st.title("🏥 Health Tracker App")
 
@@ -26,24 +49,60 @@ weight = st.number_input("Enter your weight (kg)", min_value=10.0, max_value=300
 
 if st.button("Calculate BMI"):
     if height and weight:
-        height_m = height / 100
-        bmi = weight / (height_m ** 2)
+        bmi = bmi_service.bmi(height, weight)
         st.success(f"Your BMI is: {bmi:.2f}")
-        if bmi < 18.5:
+        category = bmi_service.category(bmi)
+        if category == "Underweight":
             st.warning("You are underweight.")
-        elif 18.5 <= bmi < 25:
+        elif category == "Normal":
             st.info("You are in the normal range.")
-        elif 25 <= bmi < 30:
+        elif category == "Overweight":
             st.warning("You are overweight.")
         else:
             st.error("You are obese.")
     else:
         st.error("Please enter both height and weight.")
 
+# Batch mode: a CSV of many people, processed in chunks
+with st.expander("📊 Batch BMI from a CSV"):
+    upload = st.file_uploader("CSV with height (cm) and weight (kg) columns", type=["csv"])
+    if upload is not None and st.button("Calculate for everyone"):
+        bar = st.progress(0.0, text="Reading…")
+        size = max(upload.size, 1)
+        def progress(stats):
+            bar.progress(min(upload.tell() / size, 1.0), text=f"{stats.rows:,} rows")
+        try:
+            with stage("batch"):
+                stats, result = bmi_service.process_file(upload, progress=progress)
+        except ValueError as e:
+            bar.empty()
+            st.error(str(e))
+        else:
+            bar.empty()
+            previous = st.session_state.get("bmi_batch")
+            if previous is not None:
+                previous[1].close()
+            st.session_state.bmi_batch = (stats, result, upload.name)
+
+    if "bmi_batch" in st.session_state:
+        stats, result, source_name = st.session_state.bmi_batch
+        c1, c2, c3 = st.columns(3)
+        c1.metric("People", f"{stats.valid:,}")
+        c2.metric("Mean BMI", f"{stats.mean:.1f}")
+        c3.metric("Invalid rows", f"{stats.invalid:,}")
+        st.caption(f"BMI range {stats.min:.1f} – {stats.max:.1f}" if stats.valid else "No valid rows")
+        with stage("chart.render"):
+            st.bar_chart(stats.category_counts(), y_label="people")
+            st.bar_chart(stats.histogram_bins(), x_label="BMI", y_label="people")
+        st.download_button("Download results", lambda: (result.seek(0), result.read())[1],
+                           file_name=f"bmi_{source_name}", mime="text/csv")
+
+timer.mark("render.bmi")
+
 # --- Calorie Intake Tracker ---
 st.header("🍽️ Calorie Intake Tracker")
 
-calories_data = load_calories()
+calorie_log = load_calories()
 
 with st.form("calorie_form"):
     meal = st.text_input("Meal / Food Item")
@@ -51,22 +110,37 @@ with st.form("calorie_form"):
     submitted = st.form_submit_button("Add")
 
     if submitted and meal.strip():
-        calories_data.append({"meal": meal.strip(), "calories": cal})
-        save_calories(calories_data)
-        st.experimental_rerun()
+        with stage("save"):
+            calorie_log.add(meal.strip(), cal)
+        st.rerun()
 
-if calories_data:
+today_entries = calorie_log.entries()
+if today_entries:
     st.subheader("Today's Intake")
-    total = 0
-    for i, item in enumerate(calories_data):
+    for item in today_entries:
         st.write(f"🍽️ {item['meal']} — {item['calories']} kcal")
-        total += item['calories']
-    st.markdown(f"**🔢 Total Calories: {total} kcal**")
+    st.markdown(f"**🔢 Total Calories: {calorie_log.day_total()} kcal**")
 
     if st.button("🧹 Clear Meals"):
-        calories_data.clear()
-        save_calories(calories_data)
-        st.experimental_rerun()
+        with stage("save"):
+            calorie_log.clear()
+        st.rerun()
 else:
     st.info("No meals logged yet.")
 
+# --- Calorie Trends (from the daily totals, raw entries are not read) ---
+if calorie_log.rollups:
+    st.subheader("📈 Calorie Trend")
+    trend_views = {
+        "Last 7 days": (7, "D"),
+        "Last 30 days": (30, "D"),
+        "Weekly (12 weeks)": (84, "W"),
+        "Monthly (12 months)": (365, "MS"),
+    }
+    view = st.selectbox("Show", list(trend_views))
+    trend = calorie_trend(calorie_log.rollups, *trend_views[view])
+    with stage("chart.render"):
+        st.line_chart(trend, y_label="kcal")
+
+timer.done("render.calories")
+profiler_panel("Health Tracker")
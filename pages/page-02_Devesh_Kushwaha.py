@@ -1,15 +1,34 @@
-
 import streamlit as st
 import pandas as pd
-import altair as alt
+import os
+
+from services.generator_store import GeneratorStore, parse_upload
+from services.profiler import profiled, profiler_panel, stage
+from services.startup import PageTimer, lazy_import, warm_up
+from services.tenants import TenantRegistry, current_tenant, tenant_dir
+
+timer = PageTimer("Static Site Generators")
+warm_up()
+alt = lazy_import('altair', "Static Site Generators")  # only needed once there is a chart
 
 st.title("Static Site Generator Popularity")
 
+GENERATORS_FILE = "generators.json"
+STARS = "Stars (×1 000)"
 
-if "data" not in st.session_state:
-    st.session_state.data = pd.DataFrame(
-        {"Generator": [], "Stars (×1 000)": []}
-    )
+@st.cache_resource
+def generator_registry():
+    # one generator dataset per tenant, kept across sessions
+    return TenantRegistry(lambda tenant: GeneratorStore(os.path.join(tenant_dir(".", tenant), GENERATORS_FILE)))
+
+store = generator_registry().get(current_tenant())
+
+@profiled("filter")
+def chart_rows(top_n):
+    # the top_n generators plus an "Other" bar, largest first
+    top, other = store.top(top_n)
+    rows = top + ([other] if other else [])
+    return pd.DataFrame(rows, columns=["Generator", STARS])
 
 
 with st.form("add_row"):
@@ -18,33 +37,59 @@ with st.form("add_row"):
         name = st.text_input("Static-site generator (name)", placeholder="e.g. Hugo")
     with c2:
         stars = st.number_input("GitHub stars (×1 000)", min_value=0.0, step=0.1)
-    if st.form_submit_button("Add to chart") and name:
-        st.session_state.data = pd.concat(
-            [st.session_state.data,
-             pd.DataFrame({"Generator": [name], "Stars (×1 000)": [stars]})],
-            ignore_index=True,
-        )
+    if st.form_submit_button("Add to chart") and name.strip():
+        with stage("save"):
+            added = store.upsert(name, stars)
+        if not added:
+            st.info(f"Updated '{name.strip()}' to {stars:g}k stars.")
+
+with st.expander("Bulk load from CSV"):
+    upload = st.file_uploader("CSV with Generator and Stars columns (stars in thousands)", type=["csv"])
+    if upload is not None and st.button("Load generators"):
+        try:
+            with stage("save"):
+                rows, skipped = parse_upload(upload.getvalue())
+                added, updated = store.upsert_many(rows)
+            st.success(f"Added {added}, updated {updated}" + (f", skipped {skipped} invalid row(s)" if skipped else ""))
+        except ValueError as e:
+            st.error(str(e))
+
 
+def clear_clicked():
+    store.clear()
+    st.session_state.confirm_clear = False
 
-if not st.session_state.data.empty and st.button("Clear data"):
-    st.session_state.data = st.session_state.data.iloc[0:0]
+# The data is saved and shared by everyone in the workspace, so clearing it
+# needs a second, explicit step
+total = len(store)
+if total:
+    with st.expander("Clear data"):
+        st.warning("This removes every generator saved in this workspace, for everyone using it. It cannot be undone.")
+        confirm = st.checkbox(f"Yes, remove all {total} generators", key="confirm_clear")
+        st.button("Clear data", disabled=not confirm, on_click=clear_clicked)
 
 
-if not st.session_state.data.empty:
+if total:
+    top_n = st.slider("Generators shown", min_value=5, max_value=50, value=20, step=5) if total > 5 else total
+    data = chart_rows(top_n)
     chart = (
-        alt.Chart(st.session_state.data)
+        alt.Chart(data)
         .mark_bar()
         .encode(
             x=alt.X(
                 "Generator",
-                sort="-y",
-                axis=alt.Axis(labelFontSize=16, titleFontSize=18) 
+                sort=list(data["Generator"]),
+                axis=alt.Axis(labelFontSize=16, titleFontSize=18)
             ),
-            y="Stars (×1 000)",
-            tooltip=["Generator", "Stars (×1 000)"],
+            y=STARS,
+            tooltip=["Generator", STARS],
         )
         .properties(width=650, height=450)
     )
-    st.altair_chart(chart, use_container_width=True)
-    st.caption("Add rows above to update the graph (values are thousands of GitHub stars).")
+    with stage("chart.render"):
+        st.altair_chart(chart, use_container_width=True)
+    st.caption(f"Showing the top {min(top_n, total)} of {total} generators. "
+               "Add rows above to update the graph (values are thousands of GitHub stars).")
 
+timer.done()
+profiler_panel("Static Site Generators")
@@ -1,44 +1,29 @@
 import streamlit as st
-import random
+import io
+from datetime import date
 
-# Zodiac signs and date ranges
-zodiac_signs = [
-    ("Capricorn", (12, 22), (1, 19)),
-    ("Aquarius", (1, 20), (2, 18)),
-    ("Pisces", (2, 19), (3, 20)),
-    ("Aries", (3, 21), (4, 19)),
-    ("Taurus", (4, 20), (5, 20)),
-    ("Gemini", (5, 21), (6, 20)),
-    ("Cancer", (6, 21), (7, 22)),
-    ("Leo", (7, 23), (8, 22)),
-    ("Virgo", (8, 23), (9, 22)),
-    ("Libra", (9, 23), (10, 22)),
-    ("Scorpio", (10, 23), (11, 21)),
-    ("Sagittarius", (11, 22), (12, 21))
-]
+from services.profiler import profiled, profiler_panel, stage
+from services.startup import PageTimer, lazy_import, warm_up
+from services.zodiac import SIGN_NAMES, horoscope, horoscopes, sign_codes, zodiac_sign
 
-# Random predictions for each sign
-predictions = {
-    "Aries": "Today is a great day to start something new!",
-    "Taurus": "Patience will reward you today.",
-    "Gemini": "Communication is your strength — use it wisely.",
-    "Cancer": "Take time to care for yourself today.",
-    "Leo": "Confidence will open unexpected doors.",
-    "Virgo": "Your attention to detail will pay off.",
-    "Libra": "Balance is key — find your center.",
-    "Scorpio": "An exciting opportunity is coming your way.",
-    "Sagittarius": "Adventure awaits — say yes!",
-    "Capricorn": "Hard work today will lead to great rewards.",
-    "Aquarius": "Think outside the box for creative solutions.",
-    "Pisces": "Trust your intuition; it won’t let you down."
-}
+timer = PageTimer("Horoscope")
+warm_up()
+pd = lazy_import('pandas', "Horoscope")  # only needed for batch files
 
 # Function to get zodiac sign
+@profiled("lookup")
 def get_zodiac_sign(month, day):
-    for sign, (start_month, start_day), (end_month, end_day) in zodiac_signs:
-        if (month == start_month and day >= start_day) or (month == end_month and day <= end_day):
-            return sign
-    return "Unknown"
+    # O(1) lookup in the day-of-year table (services/zodiac.py)
+    return zodiac_sign(month, day) or "Unknown"
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def classify_upload(data, column, day):
+    # whole CSV classified at once; cached per upload, column and day
+    df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    codes = sign_codes(df[column])
+    df['Sign'] = pd.Categorical.from_codes(codes, categories=SIGN_NAMES)
+    df['Horoscope'] = horoscopes(codes, day)
+    return df
 
 # Streamlit App
 st.title("🔮 Horoscope: Your Future for Today")
@@ -62,14 +47,35 @@ if st.button("Tell My Future!"):
     if (month == 2 and day > 29) or (month in [4, 6, 9, 11] and day > 30):
         st.error("Invalid date for selected month.")
     else:
-        zodiac_sign = get_zodiac_sign(month, day)
-        if zodiac_sign != "Unknown":
-            st.write(f"✨ Your Zodiac sign is **{zodiac_sign}**.")
-            prediction = predictions.get(zodiac_sign, "Today holds surprises for you.")
+        sign = get_zodiac_sign(month, day)
+        if sign != "Unknown":
+            st.write(f"✨ Your Zodiac sign is **{sign}**.")
+            prediction = horoscope(sign)
             st.success(f"**Your future for today:** {prediction}")
         else:
             st.error("Could not determine Zodiac sign. Please check your date.")
 
+# Batch: a whole file of birthdates at once
+with st.expander("Classify a CSV of birthdates"):
+    upload = st.file_uploader("CSV with a birthdate column", type=["csv"])
+    if upload is not None:
+        # the header as read_csv parses it (quoting, a UTF-8 BOM, ...)
+        columns = list(pd.read_csv(io.BytesIO(upload.getvalue()), nrows=0).columns)
+        guess = next((i for i, c in enumerate(columns) if "birth" in c.lower() or "date" in c.lower()), 0)
+        column = st.selectbox("Birthdate column", columns, index=guess)
+        with stage("classify"):
+            result = classify_upload(upload.getvalue(), column, str(date.today()))
+        st.bar_chart(result['Sign'].value_counts(sort=False))
+        unknown = int(result['Sign'].isna().sum())
+        if unknown:
+            st.warning(f"{unknown} row(s) without a valid date")
+        st.dataframe(result.head(100), hide_index=True)
+        st.download_button("Download with signs", lambda: result.to_csv(index=False),
+                           file_name="zodiac_signs.csv", mime="text/csv")
+
 # Footer
 st.write("---")
 st.caption("🪐 Made with Streamlit & Python")
+
+timer.done()
+profiler_panel("Horoscope")
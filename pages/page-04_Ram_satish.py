@@ -1,35 +1,129 @@
 import streamlit as st
 import datetime
 
+from services.match_log import MatchStore
+from services.profiler import profiler_panel
+from services.pubsub import Channel
+from services.startup import PageTimer, warm_up
+
+timer = PageTimer("Volleyball Score Tracker")
+warm_up()
+
+MATCHES_DIR = "matches"
+REFRESH_SECONDS = 1.0   # how often a scoreboard looks for new points
+
 st.title("🏐 Volleyball Score Tracker")
 
-# Team names
-team1 = st.text_input("Team 1", "Team A")
-team2 = st.text_input("Team 2", "Team B")
-
-# Session state
-for k in ["t1", "t2", "s1", "s2", "over"]: 
-    if k not in st.session_state: st.session_state[k] = 0 if k != "over" else False
-
-# Score buttons
-c1, c2 = st.columns(2)
-with c1: 
-    if st.button(f"Point: {team1}"): 
-        if not st.session_state.over: st.session_state.t1 += 1
-with c2: 
-    if st.button(f"Point: {team2}"): 
-        if not st.session_state.over: st.session_state.t2 += 1
-
-# Display scores
-st.write(f"## {team1}: {st.session_state.t1} | Sets: {st.session_state.s1}")
-st.write(f"## {team2}: {st.session_state.t2} | Sets: {st.session_state.s2}")
-
-# Set win logic
-if st.session_state.t1 >= 25 and (st.session_state.t1 - st.session_state.t2) >= 2:
-    st.success(f"{team1} wins the set!")
-    st.session_state.s1 += 1; st.session_state.over = True
-elif st.session_state.t2 >= 25 and (st.session_state.t2 - st.session_state.t1) >= 2:
-    st.success(f"{team2} wins the set!")
-    st.session_state.s2 += 1; st.session_state.over = True
-
-# Match winner
+@st.cache_resource
+def match_store():
+    # every match of the tournament, shared by all sessions, with the
+    # channel that pushes score changes to every session watching a match
+    return MatchStore(MATCHES_DIR, Channel())
+
+store = match_store()
+
+def match_label(match_id):
+    if match_id is None:
+        return "➕ New match"
+    m = summaries.get(match_id)
+    if m is None:
+        return match_id
+    status = "finished" if m['winner'] is not None else "live"
+    return f"{m['teams'][0]} vs {m['teams'][1]} · {m['sets'][0]}-{m['sets'][1]} · {status}"
+
+# A point on a new match creates it; select it before the selectbox is drawn
+if "new_match" in st.session_state:
+    st.session_state.match_pick = st.session_state.pop("new_match")
+
+summaries = {m['id']: m for m in store.matches()}
+match_id = st.selectbox("Match", [None] + list(summaries), format_func=match_label, key="match_pick")
+# many sessions can watch a match; the scorer's buttons only show in "Score"
+role = st.radio("Mode", ["Score", "Watch"], horizontal=True, key="volley_role") if match_id else "Score"
+
+def start_match(team):
+    # the first point of a new match creates it (full rerun to select it)
+    match = store.create(team1, team2)
+    st.session_state.new_match = match.id
+    store.point(match, team)
+    st.rerun()
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def scoreboard(match_id, scoring):
+    # Reruns on its own every REFRESH_SECONDS (and on the score buttons)
+    # without rerunning the page; the subscription hands it only the fields
+    # that changed since its last run.
+    board = st.session_state.get("board")
+    if board is None or board['id'] != match_id:
+        if board is not None:
+            board['sub'].close()
+        board = st.session_state.board = {'id': match_id, 'sub': store.subscribe(match_id), 'state': {}}
+    if scoring:
+        match = store.get(match_id)
+        c1, c2, c3 = st.columns(3)
+        for col, team in ((c1, 0), (c2, 1)):
+            with col:
+                if st.button(f"Point: {match.teams[team]}"):
+                    if store.point(match, team):
+                        st.rerun()   # a set was decided: refresh the match list too
+        with c3:
+            if st.button("Undo last point", disabled=not match.rallies):
+                if store.undo(match):
+                    st.rerun()
+    store.sync(match_id)
+    changes = board['sub'].poll()
+    if changes:
+        board['state'].update(changes)
+    m = board['state']
+    team1, team2 = m['teams']
+
+    serve = " 🏐" if m['winner'] is None else ""
+    # Display scores
+    st.write(f"## {team1}: {m['points'][0]}{serve if m['serving'] == 0 else ''} | Sets: {m['sets'][0]}")
+    st.write(f"## {team2}: {m['points'][1]}{serve if m['serving'] == 1 else ''} | Sets: {m['sets'][1]}")
+
+    # Set win logic (applied by the match engine as each point is recorded)
+    if m['set_scores'] and m['points'] == (0, 0):
+        a, b = m['set_scores'][-1]
+        st.success(f"{team1 if a > b else team2} wins set {len(m['set_scores'])} ({a}-{b})!")
+    if m['winner'] is None:
+        st.caption(f"Set {m['set_number']} · first to {m['set_target']}, win by 2 · best of five")
+
+    if m['set_scores']:
+        st.table({f"Set {i}": {team1: a, team2: b} for i, (a, b) in enumerate(m['set_scores'], 1)})
+
+    # Match winner
+    if m['winner'] is not None:
+        st.success(f"🏆 {m['teams'][m['winner']]} wins the match {max(m['sets'])}-{min(m['sets'])}!")
+    st.caption(f"👀 {store.channel.viewers(match_id)} watching · live")
+
+
+if match_id is None:
+    # Team names (fixed once the match has started)
+    team1 = st.text_input("Team 1", "Team A")
+    team2 = st.text_input("Team 2", "Team B")
+    c1, c2, _ = st.columns(3)
+    for col, team, name in ((c1, 0, team1), (c2, 1, team2)):
+        with col:
+            if st.button(f"Point: {name}"):
+                start_match(team)
+    st.info("Score the first point to start the match.")
+elif store.get(match_id) is None:
+    st.warning("This match no longer exists.")
+else:
+    scoreboard(match_id, role == "Score")
+
+# Tournament overview, read from the match index only
+with st.expander("Tournament"):
+    if summaries:
+        st.dataframe([{
+            'Match': f"{m['teams'][0]} vs {m['teams'][1]}",
+            'Sets': f"{m['sets'][0]}-{m['sets'][1]}",
+            'Set scores': ", ".join(f"{a}-{b}" for a, b in m['set_scores']),
+            'Winner': m['teams'][m['winner']] if m['winner'] is not None else "",
+            'Started': datetime.datetime.fromtimestamp(m['started']).strftime("%Y-%m-%d %H:%M"),
+        } for m in summaries.values()], hide_index=True)
+    else:
+        st.caption("No matches yet.")
+
+timer.done()
+profiler_panel("Volleyball Score Tracker")
@@ -1,9 +1,29 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import os
-import json
 from datetime import datetime
+from functools import partial
+
+from services import bulk_io
+from services.data_access import cache_stats, ledger_read
+from services.finance_jobs import job_key, job_result, job_stats, schedule_ledger_jobs
+from services.fragments import Sections
+from services.ledger import Ledger, last_days, month_to_date
+from services.profiler import profiled, profiler_panel, stage
+from services.recurring import new_rule, next_date
+from services.scheduler import Scheduler
+from services.startup import PageTimer, lazy_import, warm_up
+from services.tenants import DEFAULT_TENANT, TenantRegistry, current_tenant, tenant_dir
+from services.write_coordinator import coordinator
+
+PAGE_NAME = "Financial Dashboard"
+timer = PageTimer(PAGE_NAME)
+warm_up()
+px = lazy_import('plotly.express', PAGE_NAME)  # only needed once a chart is drawn
+
+# Streamlit config (before any data is loaded)
+st.set_page_config(page_title="Financial Dashboard", layout="wide")
+st.title("💰 Financial Dashboard")
 
 # File paths
 BASE_DIR = os.path.dirname(__file__)
@@ -16,173 +36,534 @@ INVESTMENT_TYPES_FILE = os.path.join(BASE_DIR, 'investment_types.json')
 
 # ----------- Data Loaders & Savers -------------
 
-def load_json(path, default):
-    if os.path.exists(path):
-        with open(path, 'r') as f:
-            return json.load(f)
-    return default
+def open_ledger(tenant):
+    # one SQLite ledger per tenant; the default tenant keeps the original
+    # location and imports the old CSV/JSON files the first time
+    legacy_files = None
+    if tenant == DEFAULT_TENANT:
+        legacy_files = {
+            'expenses': EXPENSES_FILE,
+            'savings': SAVINGS_FILE,
+            'categories': CATEGORIES_FILE,
+            'subcategories': SUBCATEGORIES_FILE,
+            'investment_types': INVESTMENT_TYPES_FILE,
+            'balance': BALANCE_FILE,
+        }
+    return Ledger(os.path.join(tenant_dir(BASE_DIR, tenant), 'finance.db'), legacy_files=legacy_files)
+
+@st.cache_resource
+def ledger_registry():
+    # open ledgers for the most recently active tenants in this process
+    return TenantRegistry(open_ledger)
 
-def save_json(path, data):
-    with open(path, 'w') as f:
-        json.dump(data, f, indent=2)
+@st.cache_resource
+def job_scheduler():
+    # one background worker per server process (services/finance_jobs.py)
+    return Scheduler().start()
 
+tenant = current_tenant()
+ledger = ledger_registry().get(tenant)
+scheduler = job_scheduler()
+schedule_ledger_jobs(scheduler, tenant, ledger)
+
+DEFAULT_CATEGORIES = ['Food', 'Transport', 'Entertainment', 'Utilities', 'Debts', 'Other']
+DEFAULT_INVESTMENT_TYPES = ['FD', 'Savings Account', 'Stocks', 'Crypto', 'Bonds', 'Real Estate']
+
+@profiled("load")
 def load_categories():
     # returns list of categories
-    return load_json(CATEGORIES_FILE, ['Food', 'Transport', 'Entertainment', 'Utilities', 'Debts', 'Other'])
-
-def save_categories(categories):
-    save_json(CATEGORIES_FILE, categories)
+    return ledger_read(ledger, 'settings', 'get_setting', 'categories', DEFAULT_CATEGORIES)
 
+@profiled("load")
 def load_subcategories():
     # dict: {category: [subcat1, subcat2,...]}
-    return load_json(SUBCATEGORIES_FILE, {})
-
-def save_subcategories(subcats):
-    save_json(SUBCATEGORIES_FILE, subcats)
+    return ledger_read(ledger, 'settings', 'get_setting', 'subcategories', {})
 
+@profiled("load")
 def load_investment_types():
-    return load_json(INVESTMENT_TYPES_FILE, ['FD', 'Savings Account', 'Stocks', 'Crypto', 'Bonds', 'Real Estate'])
-
-def save_investment_types(types):
-    save_json(INVESTMENT_TYPES_FILE, types)
-
-def load_expenses():
-    if os.path.exists(EXPENSES_FILE):
-        return pd.read_csv(EXPENSES_FILE)
-    return pd.DataFrame(columns=['Date', 'Category', 'Subcategory', 'Amount', 'Notes', 'Status'])
-
-def save_expenses(df):
-    df.to_csv(EXPENSES_FILE, index=False)
-
-def load_savings():
-    if os.path.exists(SAVINGS_FILE):
-        return pd.read_csv(SAVINGS_FILE)
-    return pd.DataFrame(columns=['Date', 'InvestmentType', 'Amount', 'City', 'Area', 'Notes'])
-
-def save_savings(df):
-    df.to_csv(SAVINGS_FILE, index=False)
-
+    return ledger_read(ledger, 'settings', 'get_setting', 'investment_types', DEFAULT_INVESTMENT_TYPES)
+
+# The list edits below are read-modify-write in one ledger transaction, so
+# two sessions editing the same list at once both keep their change.
+
+@profiled("save")
+def add_category(cat):
+    ledger.update_setting('categories', lambda cats: cats if cat in cats else cats + [cat], DEFAULT_CATEGORIES)
+    ledger.update_setting('subcategories', lambda subs: {**subs, cat: subs.get(cat, [])}, {})
+
+@profiled("save")
+def add_subcategory(cat, subcat):
+    def update(subs):
+        current = subs.get(cat, [])
+        return subs if subcat in current else {**subs, cat: current + [subcat]}
+    ledger.update_setting('subcategories', update, {})
+
+@profiled("save")
+def delete_subcategory(cat, subcat):
+    def update(subs):
+        return {**subs, cat: [sc for sc in subs.get(cat, []) if sc != subcat]}
+    ledger.update_setting('subcategories', update, {})
+
+@profiled("save")
+def add_investment_type(inv_type):
+    ledger.update_setting('investment_types', lambda types: types if inv_type in types else types + [inv_type], DEFAULT_INVESTMENT_TYPES)
+
+@profiled("save")
+def delete_investment_type(inv_type):
+    ledger.update_setting('investment_types', lambda types: [t for t in types if t != inv_type], DEFAULT_INVESTMENT_TYPES)
+
+@profiled("load")
+def load_recurring():
+    return ledger_read(ledger, 'settings', 'get_setting', 'recurring', [])
+
+@profiled("save")
+def add_recurring(rule):
+    ledger.update_setting('recurring', lambda rules: rules + [rule], [])
+    scheduler.trigger(job_key(tenant, 'recurring'))
+
+@profiled("save")
+def delete_recurring(rule_id):
+    ledger.update_setting('recurring', lambda rules: [r for r in rules if r['id'] != rule_id], [])
+
+def expense_where(status=None, categories=None, subcategories=None):
+    return {'Status': status, 'Category': categories, 'Subcategory': subcategories}
+
+@profiled("filter")
+def query_expenses(start=None, end=None, status=None, categories=None, subcategories=None, limit=None, offset=0):
+    # filtered in SQL, newest first
+    where = expense_where(status, categories, subcategories)
+    return ledger_read(ledger, 'expenses', 'query', 'expenses', start, end, where, limit=limit, offset=offset)
+
+@profiled("filter")
+def count_expenses(start=None, end=None, status=None, categories=None, subcategories=None):
+    where = expense_where(status, categories, subcategories)
+    return ledger_read(ledger, 'expenses', 'count', 'expenses', start, end, where)
+
+@profiled("save")
+def add_expense(row):
+    return ledger.insert('expenses', row)
+
+@profiled("filter")
+def query_savings(start=None, end=None, investment_types=None, limit=None, offset=0):
+    return ledger_read(ledger, 'savings', 'query', 'savings', start, end, {'InvestmentType': investment_types}, limit=limit, offset=offset)
+
+@profiled("filter")
+def count_savings(start=None, end=None, investment_types=None):
+    return ledger_read(ledger, 'savings', 'count', 'savings', start, end, {'InvestmentType': investment_types})
+
+@profiled("save")
+def add_saving(row):
+    return ledger.insert('savings', row)
+
+@profiled("load")
 def load_balance():
-    return load_json(BALANCE_FILE, {"base_balance": 0.0})
+    return ledger_read(ledger, 'settings', 'get_setting', 'balance', {"base_balance": 0.0})
 
+@profiled("save")
 def save_balance(data):
-    save_json(BALANCE_FILE, data)
+    ledger.set_setting('balance', data)
+
+# ----------- Chart data -------------
+# Pie charts get pre-aggregated {label: total} dicts, so the figure only
+# carries one number per slice instead of every ledger row.
+
+@profiled("filter")
+def investment_type_totals(start, end, inv_types):
+    # cached until the savings table is written
+    return ledger_read(ledger, 'savings', 'group_totals', 'savings', 'InvestmentType', start, end, {'InvestmentType': inv_types})
+
+@profiled("filter")
+def period_summaries(table, where=None):
+    # {label: {'count', 'total'}} for the recent periods shown above each tab
+    periods = {"Last 7 days": last_days(7), "Last 30 days": last_days(30), "Month to date": month_to_date()}
+    return {label: ledger_read(ledger, table, 'summary', table, start, end, where)
+            for label, (start, end) in periods.items()}
+
+def period_metrics(table, where=None, prefix=""):
+    for col, (label, summary) in zip(st.columns(3), period_summaries(table, where).items()):
+        col.metric(f"{prefix}{label}", f"₹{summary['total']:,.2f}", f"{summary['count']} entries", delta_color="off")
+
+@profiled("chart")
+def totals_pie(totals, **kwargs):
+    return px.pie(names=list(totals.keys()), values=list(totals.values()), **kwargs)
+
+# ----------- Paged tables -------------
+
+PAGE_SIZES = [10, 25, 50, 100]
+
+def paginate(key, total_rows, filters):
+    # Page cursor for one table, kept in session_state.
+    # Returns (limit, offset) for the current page; changing filters goes back to page 1.
+    cursor = st.session_state.setdefault(f"{key}_cursor", {'page': 0, 'filters': None})
+    if cursor['filters'] != filters:
+        cursor.update(page=0, filters=filters)
+
+    c1, c2, c3, c4 = st.columns([2, 1, 2, 1])
+    page_size = c1.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    page_count = max(1, -(-total_rows // page_size))
+    if c2.button("◀ Prev", key=f"{key}_prev"):
+        cursor['page'] -= 1
+    if c4.button("Next ▶", key=f"{key}_next"):
+        cursor['page'] += 1
+    cursor['page'] = min(max(cursor['page'], 0), page_count - 1)
+    c3.write(f"Page {cursor['page'] + 1} of {page_count} ({total_rows} rows)")
+    return page_size, cursor['page'] * page_size
+
+# ----------- Bulk import / export -------------
+# Files are streamed in chunks: imports commit one transaction per chunk,
+# exports are only written when the download button is clicked.
+
+@profiled("save")
+def import_rows(table, upload, known, unknown, progress):
+    return bulk_io.import_file(ledger, table, upload, known, fmt=bulk_io.file_format(upload.name),
+                               unknown=unknown, progress=progress)
+
+@profiled("load")
+def export_rows(table, fmt, start, end, where):
+    return bulk_io.export_file(ledger, table, fmt, start, end, where)
+
+def bulk_panel(table, known, start, end, where):
+    # Import a CSV/Parquet file into `table`, or export the rows matching
+    # the tab's current filters. The import summary survives the rerun.
+    label = "categories" if table == 'expenses' else "investment types"
+    with st.expander("📦 Bulk import / export"):
+        report = st.session_state.pop(f"{table}_import_report", None)
+        if report:
+            st.success(f"Imported {report['inserted']} of {report['rows']} rows "
+                       f"({report['duplicates']} duplicates skipped, {report['rejected']} rejected).")
+            if report['new_values']:
+                st.info(f"New {label}: {', '.join(report['new_values'])}")
+            if report['mapped']:
+                st.info(f"{report['mapped']} row(s) with unknown {label} were mapped.")
+            if report['rejected_samples']:
+                st.dataframe(report['rejected_samples'], hide_index=True)
+
+        upload = st.file_uploader("Import file", type=['csv', 'parquet'] if bulk_io.PARQUET_AVAILABLE else ['csv'],
+                                  key=f"{table}_upload")
+        unknown = st.selectbox(f"Unknown {label}", [f"Add as new {label}"] + known, key=f"{table}_unknown")
+        if st.button("Import", key=f"{table}_import", disabled=upload is None):
+            bar = st.progress(0.0, text="Importing…")
+            size = max(upload.size, 1)
+            def progress(report):
+                bar.progress(min(upload.tell() / size, 1.0), text=f"{report['inserted']} rows imported")
+            try:
+                report = import_rows(table, upload, known, None if unknown == f"Add as new {label}" else unknown, progress)
+            except ValueError as e:
+                st.error(f"Could not import {upload.name}: {e}")
+            else:
+                st.session_state[f"{table}_import_report"] = report
+                st.rerun()
 
-# ----------- Data Initialization -------------
+        st.caption("Export the rows matching the current filters")
+        cols = st.columns(len(bulk_io.FORMATS))
+        for col, fmt in zip(cols, bulk_io.FORMATS):
+            col.download_button(f"Export {fmt.upper()}", partial(export_rows, table, fmt, start, end, where),
+                                file_name=f"{table}.{fmt}", key=f"{table}_export_{fmt}")
+
+# ----------- Sections -------------
+# The page is split into fragments that rerun on their own: a widget only
+# reruns the section it is in, and a write reruns the sections reading the
+# data it changed (see services/fragments.py). Writes are made in widget
+# callbacks for that reason. Data names:
+#   balance, categories (with subcategories), investment_types, recurring,
+#   expenses, savings, totals (running totals, e.g. after a recount),
+#   staged.expenses / staged.savings (staged table edits),
+#   savings_filters (the savings tab's filters, also used by its chart)
+
+sections = Sections("finance", page=PAGE_NAME)
+
+# ----------- Staged changes -------------
+# Table edits, deletes and "Mark Paid" clicks are collected in session_state
+# and written to the ledger together, in one transaction and one rerun.
+
+ROW_WIDGET_PREFIXES = {
+    'expenses': ['exp_amt_', 'exp_notes_', 'exp_status_', 'exp_del_'],
+    'savings': ['inv_amt_', 'inv_notes_', 'inv_city_', 'inv_area_', 'inv_del_'],
+}
+
+def staged_changes():
+    # {(table, row_id): {column: value} to update, or None to delete}
+    return st.session_state.setdefault('staged_changes', {})
+
+def stage_change(table, row_id, values):
+    staged_changes()[(table, row_id)] = values
+
+def stage_status(table, row_id, status):
+    staged = staged_changes()
+    current = staged.get((table, row_id), {})
+    if current is not None:
+        staged[(table, row_id)] = {**current, 'Status': status}
+
+def unstage_change(table, row_id):
+    staged_changes().pop((table, row_id), None)
+
+def staged_row(table, row, row_id):
+    # the row as staged so far: what its table widgets start from, so
+    # staging the table again keeps earlier changes (e.g. a "Mark Paid")
+    values = staged_changes().get((table, row_id))
+    return {**row, **values} if values else row
+
+def staged_delete(table, row_id):
+    # whether the row's delete is staged: its delete checkbox starts checked
+    staged = staged_changes()
+    return (table, row_id) in staged and staged[(table, row_id)] is None
+
+def _reset_row_widgets():
+    # staged rows re-read their widget values from the ledger on the next run
+    for table, row_id in staged_changes():
+        for prefix in ROW_WIDGET_PREFIXES[table]:
+            st.session_state.pop(f"{prefix}{row_id}", None)
+
+@profiled("save")
+def apply_staged_changes():
+    staged = staged_changes()
+    ledger.apply_changes([(table, row_id, values) for (table, row_id), values in staged.items()])
+    _reset_row_widgets()
+    staged.clear()
+
+def discard_staged_changes():
+    _reset_row_widgets()
+    staged_changes().clear()
+
+# ----------- Callbacks -------------
+
+def base_balance_changed():
+    save_balance({**load_balance(), 'base_balance': st.session_state.base_balance})
+    sections.notify('balance')
+
+def add_category_clicked():
+    new_cat = st.session_state.new_cat
+    if new_cat and new_cat not in load_categories():
+        add_category(new_cat)
+        sections.flash('categories', 'success', f"Added category '{new_cat}'")
+        sections.notify('categories')
+    elif new_cat:
+        sections.flash('categories', 'warning', f"Category '{new_cat}' already exists")
+
+def add_subcategory_clicked():
+    cat, new_subcat = st.session_state.manage_cat, st.session_state.new_subcat
+    if new_subcat and new_subcat not in load_subcategories().get(cat, []):
+        add_subcategory(cat, new_subcat)
+        sections.flash('categories', 'success', f"Added subcategory '{new_subcat}' to '{cat}'")
+        sections.notify('categories')
+    elif new_subcat:
+        sections.flash('categories', 'warning', f"Subcategory '{new_subcat}' already exists in '{cat}'")
+
+def delete_subcategory_clicked(cat, subcat):
+    delete_subcategory(cat, subcat)
+    sections.flash('categories', 'success', f"Deleted subcategory '{subcat}'")
+    sections.notify('categories')
+
+def add_investment_type_clicked():
+    new_inv_type = st.session_state.new_inv_type
+    if new_inv_type and new_inv_type not in load_investment_types():
+        add_investment_type(new_inv_type)
+        sections.flash('investment_types', 'success', f"Added investment type '{new_inv_type}'")
+        sections.notify('investment_types')
+    elif new_inv_type:
+        sections.flash('investment_types', 'warning', f"Investment type '{new_inv_type}' already exists")
+
+def delete_investment_type_clicked(inv_type):
+    delete_investment_type(inv_type)
+    sections.flash('investment_types', 'success', f"Deleted investment type '{inv_type}'")
+    sections.notify('investment_types')
+
+def recount_clicked():
+    mismatches = ledger.verify_aggregates(repair=True)
+    if mismatches:
+        sections.flash('verify', 'warning', f"Fixed {len(mismatches)} total(s) that had drifted")
+        sections.notify('totals', also=['verify'])
+    else:
+        sections.flash('verify', 'success', "All totals match the ledger")
+
+def add_recurring_submitted():
+    s = st.session_state
+    if s.r_amount > 0:
+        add_recurring(new_rule(s.r_category, s.r_amount, s.r_day, s.r_start, s.r_subcat, s.r_notes))
+        sections.flash('expenses', 'success', "Recurring expense added!")
+        sections.notify('recurring')
+
+def delete_recurring_clicked(rule_id):
+    delete_recurring(rule_id)
+    sections.notify('recurring')
+
+def add_expense_submitted(subcat_choice):
+    # subcat_choice: the form showed a subcategory selectbox (not a text box)
+    s = st.session_state
+    subcat = s.e_subcat if subcat_choice else s.e_subcat_text
+    add_expense({
+        'Date': pd.to_datetime(s.e_date),
+        'Category': s.e_category,
+        'Subcategory': subcat if subcat else "",
+        'Amount': s.e_amount,
+        'Notes': s.e_notes,
+        'Status': s.e_status
+    })
+    sections.flash('expenses', 'success', "Expense added!")
+    sections.notify('expenses')
+
+def stage_expense_edits(originals):
+    # "Stage changes" under the expenses table; originals: {row id: (amount,
+    # notes, status)} as stored in the ledger. The widgets start from the
+    # staged values, so they hold everything staged for the row and only the
+    # fields that differ from the ledger are kept.
+    s = st.session_state
+    for idx, (amount, notes, status) in originals.items():
+        edited = {'Amount': s[f"exp_amt_{idx}"], 'Notes': s[f"exp_notes_{idx}"], 'Status': s[f"exp_status_{idx}"]}
+        changes = {col: value for (col, value), old in zip(edited.items(), (amount, notes, status)) if value != old}
+        if s[f"exp_del_{idx}"]:
+            stage_change('expenses', idx, None)
+        elif changes:
+            stage_change('expenses', idx, changes)
+        else:
+            unstage_change('expenses', idx)
+    sections.notify('staged.expenses')
+
+def mark_paid_clicked(row_id):
+    stage_status('expenses', row_id, 'Paid')
+    # the table's status box starts from the staged value again
+    st.session_state.pop(f"exp_status_{row_id}", None)
+    sections.notify('staged.expenses')
+
+def add_saving_submitted(location_shown):
+    # location_shown: the form had the City / Area boxes (Real Estate)
+    s = st.session_state
+    real_estate = s.s_type == "Real Estate" and location_shown
+    add_saving({
+        'Date': pd.to_datetime(s.s_date),
+        'InvestmentType': s.s_type,
+        'Amount': s.s_amount,
+        'City': s.s_city if real_estate else "",
+        'Area': s.s_area if real_estate else "",
+        'Notes': s.s_notes
+    })
+    sections.flash('savings', 'success', "Investment added!")
+    sections.notify('savings')
+
+def stage_saving_edits(originals):
+    # originals: {row id: (investment type, amount, notes, city, area)} as
+    # stored in the ledger; like stage_expense_edits
+    s = st.session_state
+    for idx, (inv_type, amount, notes, city, area) in originals.items():
+        edited = {'Amount': s[f"inv_amt_{idx}"], 'Notes': s[f"inv_notes_{idx}"]}
+        old = {'Amount': amount, 'Notes': notes}
+        if inv_type == "Real Estate":
+            edited.update({'City': s[f"inv_city_{idx}"], 'Area': s[f"inv_area_{idx}"]})
+            old.update({'City': city, 'Area': area})
+        changes = {col: value for col, value in edited.items() if value != old[col]}
+        if s[f"inv_del_{idx}"]:
+            stage_change('savings', idx, None)
+        elif changes:
+            stage_change('savings', idx, changes)
+        else:
+            unstage_change('savings', idx)
+    sections.notify('staged.savings')
 
-categories = load_categories()
-subcategories = load_subcategories()
-investment_types = load_investment_types()
-df_exp = load_expenses()
-df_save = load_savings()
-balance_data = load_balance()
+def apply_clicked():
+    apply_staged_changes()
+    sections.notify('expenses', 'savings', 'staged.expenses', 'staged.savings')
 
-# Ensure datetime format
-df_exp['Date'] = pd.to_datetime(df_exp['Date'], errors='coerce')
-df_exp = df_exp[df_exp['Date'].notna()]
-df_save['Date'] = pd.to_datetime(df_save['Date'], errors='coerce')
-df_save = df_save[df_save['Date'].notna()]
+def discard_clicked():
+    discard_staged_changes()
+    sections.notify('staged.expenses', 'staged.savings')
 
-# Calculate balances
-savings_account_total = df_save[df_save['InvestmentType'] == 'Savings Account']['Amount'].sum()
-paid_debts_total = df_exp[(df_exp['Status'] == 'Paid') & (df_exp['Category'] == 'Debts')]['Amount'].sum()
+def savings_filters_changed():
+    sections.notify('savings_filters')
 
-bank_balance = balance_data.get('base_balance', 0) + savings_account_total - paid_debts_total
-total_investments = df_save['Amount'].sum() - savings_account_total
-net_worth = bank_balance + total_investments
+DEFAULT_DATE_RANGE = [datetime(2000, 1, 1), datetime.today()]
 
-balance_data['base_balance'] = balance_data.get('base_balance', 0)
-save_balance(balance_data)
-
-# Streamlit config
-st.set_page_config(page_title="Financial Dashboard", layout="wide")
-st.title("💰 Financial Dashboard")
+def savings_filter_values():
+    # (start, end, investment types) from the savings tab's filters; None
+    # while only one end of the date range is picked
+    dates = st.session_state.get('save_date_filter', DEFAULT_DATE_RANGE)
+    if len(dates) != 2:
+        return None
+    return dates[0], dates[1], st.session_state.get('save_inv_filter', load_investment_types())
 
 # ----------- Sidebar: Base balance & Manage Categories/Subcategories/Investment Types -------------
 
-st.sidebar.header("Setup Base Bank Balance")
-base_balance_input = st.sidebar.number_input("Base Balance (₹)", min_value=0.0, value=balance_data.get('base_balance', 0.0), step=1000.0, format="%.2f")
-if base_balance_input != balance_data.get('base_balance', 0.0):
-    balance_data['base_balance'] = base_balance_input
-    save_balance(balance_data)
-    st.rerun()
-
-st.sidebar.markdown("---")
+@sections.section('balance', reads=['balance'])
+def base_balance_section():
+    st.header("Setup Base Bank Balance")
+    st.number_input("Base Balance (₹)", min_value=0.0, value=load_balance().get('base_balance', 0.0), step=1000.0,
+                    format="%.2f", key="base_balance", on_change=base_balance_changed)
 
 # Manage Categories
-with st.sidebar.expander("Manage Expense Categories and Subcategories"):
-    st.subheader("Categories")
-    new_cat = st.text_input("Add New Category")
-    if st.button("Add Category"):
-        if new_cat and new_cat not in categories:
-            categories.append(new_cat)
-            save_categories(categories)
-            subcategories[new_cat] = []
-            save_subcategories(subcategories)
-            st.success(f"Added category '{new_cat}'")
-        elif new_cat in categories:
-            st.warning(f"Category '{new_cat}' already exists")
-
-    st.subheader("Subcategories")
-    selected_cat = st.selectbox("Select Category to Manage Subcategories", options=categories)
-    current_subcats = subcategories.get(selected_cat, [])
-    new_subcat = st.text_input("Add New Subcategory")
-    if st.button("Add Subcategory"):
-        if new_subcat and new_subcat not in current_subcats:
-            current_subcats.append(new_subcat)
-            subcategories[selected_cat] = current_subcats
-            save_subcategories(subcategories)
-            st.success(f"Added subcategory '{new_subcat}' to '{selected_cat}'")
-        elif new_subcat in current_subcats:
-            st.warning(f"Subcategory '{new_subcat}' already exists in '{selected_cat}'")
-
-    if current_subcats:
-        st.write(f"Subcategories under '{selected_cat}':")
-        for sc in current_subcats:
-            if st.button(f"Delete Subcategory: {sc}"):
-                current_subcats.remove(sc)
-                subcategories[selected_cat] = current_subcats
-                save_subcategories(subcategories)
-                st.success(f"Deleted subcategory '{sc}'")
-                st.rerun()
-
-st.sidebar.markdown("---")
+@sections.section('categories', reads=['categories'])
+def categories_section():
+    categories = load_categories()
+    subcategories = load_subcategories()
+    with st.expander("Manage Expense Categories and Subcategories"):
+        st.subheader("Categories")
+        st.text_input("Add New Category", key="new_cat")
+        st.button("Add Category", on_click=add_category_clicked)
+
+        st.subheader("Subcategories")
+        selected_cat = st.selectbox("Select Category to Manage Subcategories", options=categories, key="manage_cat")
+        current_subcats = subcategories.get(selected_cat, [])
+        st.text_input("Add New Subcategory", key="new_subcat")
+        st.button("Add Subcategory", on_click=add_subcategory_clicked)
+
+        if current_subcats:
+            st.write(f"Subcategories under '{selected_cat}':")
+            for sc in current_subcats:
+                st.button(f"Delete Subcategory: {sc}", on_click=delete_subcategory_clicked, args=(selected_cat, sc))
 
 # Manage Investment Types
-with st.sidebar.expander("Manage Investment Types"):
-    new_inv_type = st.text_input("Add New Investment Type")
-    if st.button("Add Investment Type"):
-        if new_inv_type and new_inv_type not in investment_types:
-            investment_types.append(new_inv_type)
-            save_investment_types(investment_types)
-            st.success(f"Added investment type '{new_inv_type}'")
-        elif new_inv_type in investment_types:
-            st.warning(f"Investment type '{new_inv_type}' already exists")
-    if investment_types:
+@sections.section('investment_types', reads=['investment_types'])
+def investment_types_section():
+    investment_types = load_investment_types()
+    with st.expander("Manage Investment Types"):
+        st.text_input("Add New Investment Type", key="new_inv_type")
+        st.button("Add Investment Type", on_click=add_investment_type_clicked)
         for inv_type in investment_types:
-            if st.button(f"Delete Investment Type: {inv_type}"):
-                investment_types.remove(inv_type)
-                save_investment_types(investment_types)
-                st.success(f"Deleted investment type '{inv_type}'")
-                st.rerun()
+            st.button(f"Delete Investment Type: {inv_type}", on_click=delete_investment_type_clicked, args=(inv_type,))
 
-st.sidebar.markdown("---")
+# Running totals are only checked against a full recount when asked
+@sections.section('verify')
+def verify_section():
+    with st.expander("Verify Balances"):
+        st.button("Recount totals", on_click=recount_clicked)
 
 # ----------- Show Balances -------------
 
-st.markdown(f"### 🏦 Bank Balance: ₹{bank_balance:,.2f}")
-st.markdown(f"### 📈 Estimated Net Worth: ₹{net_worth:,.2f}")
-
-# ----------- Tabs -------------
-
-tabs = st.tabs(["Expenses", "Savings & Investments"])
-
-with tabs[0]:
+@sections.section('header', reads=['balance', 'expenses', 'savings', 'totals'])
+def balances_section():
+    # Calculate balances from the ledger's running totals (no scan per rerun)
+    totals = ledger.aggregates
+    savings_account_total = totals.savings_type_total('Savings Account')
+    paid_debts_total = totals.expense_total('Debts', 'Paid')
+
+    bank_balance = load_balance().get('base_balance', 0) + savings_account_total - paid_debts_total
+    total_investments = totals.savings_total() - savings_account_total
+    net_worth = bank_balance + total_investments
+
+    st.markdown(f"### 🏦 Bank Balance: ₹{bank_balance:,.2f}")
+    st.markdown(f"### 📈 Estimated Net Worth: ₹{net_worth:,.2f}")
+
+# ----------- Pending changes -------------
+
+@sections.section('changes', reads=['staged.expenses', 'staged.savings'])
+def changes_section():
+    staged = staged_changes()
+    if staged:
+        c1, c2, c3 = st.columns([4, 1, 1])
+        c1.warning(f"📝 {len(staged)} pending change(s) not saved yet")
+        c2.button("💾 Apply changes", on_click=apply_clicked)
+        c3.button("Discard changes", on_click=discard_clicked)
+
+# ----------- Expenses tab -------------
+
+@sections.section('expenses', reads=['expenses', 'categories', 'recurring', 'staged.expenses'])
+def expenses_section():
+    categories = load_categories()
+    subcategories = load_subcategories()
     st.header("📉 Expense Tracker")
+    period_metrics('expenses', prefix="Spent · ")
 
     # Filters
     with st.expander("Filters"):
-        date_filter = st.date_input("Date Range", [datetime(2000,1,1), datetime.today()])
+        date_filter = st.date_input("Date Range", DEFAULT_DATE_RANGE)
         status_filter = st.selectbox("Status", ["All", "Paid", "Pending"])
         category_filter = st.multiselect("Filter by Category", categories)
         # Subcategory filter depends on selected categories
@@ -192,199 +573,239 @@ with tabs[0]:
                 filtered_subcats.extend(subcategories.get(cat, []))
         subcategory_filter = st.multiselect("Filter by Subcategory", filtered_subcats)
 
+    if len(date_filter) != 2:
+        st.info("Pick the end of the date range to see the expenses.")
+        return
     start_date, end_date = date_filter
-    filtered_exp = df_exp[
-        (df_exp['Date'] >= pd.to_datetime(start_date)) &
-        (df_exp['Date'] <= pd.to_datetime(end_date))
-    ]
-
-    if status_filter != "All":
-        filtered_exp = filtered_exp[filtered_exp['Status'] == status_filter]
-    if category_filter:
-        filtered_exp = filtered_exp[filtered_exp['Category'].isin(category_filter)]
-    if subcategory_filter:
-        filtered_exp = filtered_exp[filtered_exp['Subcategory'].isin(subcategory_filter)]
+    exp_filters = dict(
+        start=start_date, end=end_date,
+        status=None if status_filter == "All" else status_filter,
+        categories=category_filter,
+        subcategories=subcategory_filter,
+    )
+    bulk_panel('expenses', categories, start_date, end_date,
+               expense_where(exp_filters['status'], category_filter, subcategory_filter))
+
+    # Recurring expenses are posted as Pending by the scheduler when due
+    with st.expander("🔁 Recurring expenses"):
+        for rule in load_recurring():
+            c1, c2 = st.columns([5, 1])
+            c1.write(f"{rule['Category']} {rule['Subcategory']} | ₹{rule['Amount']:,.2f} on day {rule['day']} "
+                     f"| next {next_date(rule).date()} | {rule['Notes']}")
+            c2.button("Delete", key=f"del_recurring_{rule['id']}", on_click=delete_recurring_clicked, args=(rule['id'],))
+        with st.form("recurring_form", clear_on_submit=True):
+            st.selectbox("Category", categories, key="r_category")
+            st.text_input("Subcategory (Optional)", key="r_subcat")
+            st.number_input("Amount", min_value=0.0, format="%.2f", key="r_amount")
+            st.number_input("Day of month", min_value=1, max_value=31, value=1, key="r_day")
+            st.date_input("Starting", value=datetime.now(), key="r_start")
+            st.text_input("Notes", key="r_notes")
+            st.form_submit_button("Add Recurring Expense", on_click=add_recurring_submitted)
 
     # Add Expense
     st.subheader("Add New Expense")
     with st.form("expense_form", clear_on_submit=True):
         # Sync default date with device time
-        date = st.date_input("Date", value=datetime.now())
-        category = st.selectbox("Category", categories)
+        st.date_input("Date", value=datetime.now(), key="e_date")
+        category = st.selectbox("Category", categories, key="e_category")
         # Show subcategory dropdown dynamically based on selected category
         subs = subcategories.get(category, [])
         if subs:
-            subcat = st.selectbox("Subcategory", subs)
+            st.selectbox("Subcategory", subs, key="e_subcat")
         else:
-            subcat = st.text_input("Subcategory (Optional)")
-        amount = st.number_input("Amount", min_value=0.0, format="%.2f")
-        notes = st.text_input("Notes")
-        status = st.selectbox("Status", ["Paid", "Pending"])
-        submitted = st.form_submit_button("Add Expense")
-
-    if submitted:
-        new_row = {
-            'Date': pd.to_datetime(date),
-            'Category': category,
-            'Subcategory': subcat if subcat else "",
-            'Amount': amount,
-            'Notes': notes,
-            'Status': status
-        }
-        df_exp = pd.concat([df_exp, pd.DataFrame([new_row])], ignore_index=True)
-        save_expenses(df_exp)
-        st.success("Expense added!")
-        st.rerun()
+            st.text_input("Subcategory (Optional)", key="e_subcat_text")
+        st.number_input("Amount", min_value=0.0, format="%.2f", key="e_amount")
+        st.text_input("Notes", key="e_notes")
+        st.selectbox("Status", ["Paid", "Pending"], key="e_status")
+        st.form_submit_button("Add Expense", on_click=add_expense_submitted, args=(bool(subs),))
 
-    # Show expenses with inline editing & delete buttons
+    # Show expenses one page at a time; edits and deletes on a page are staged together
     st.subheader("Expenses Table")
-    if filtered_exp.empty:
+    exp_total = count_expenses(**exp_filters)
+    if exp_total == 0:
         st.info("No expenses match the current filters.")
     else:
-        for idx, row in filtered_exp.sort_values(by='Date', ascending=False).iterrows():
-            cols = st.columns([2, 2, 2, 2, 3, 1, 1])
-            cols[0].write(row['Date'].date())
-            cols[1].write(row['Category'])
-            cols[2].write(row['Subcategory'])
-            # Inline editable amount
-            new_amt = cols[3].number_input(f"Amount_{idx}", min_value=0.0, value=float(row['Amount']), key=f"exp_amt_{idx}")
-            notes_val = cols[4].text_input(f"Notes_{idx}", value=row['Notes'], key=f"exp_notes_{idx}")
-            status_val = cols[5].selectbox(f"Status_{idx}", options=["Paid", "Pending"], index=0 if row['Status']=='Paid' else 1, key=f"exp_status_{idx}")
-            if new_amt != row['Amount'] or notes_val != row['Notes'] or status_val != row['Status']:
-                df_exp.at[idx, 'Amount'] = new_amt
-                df_exp.at[idx, 'Notes'] = notes_val
-                df_exp.at[idx, 'Status'] = status_val
-                save_expenses(df_exp)
-                st.success(f"Expense updated (ID: {idx})")
-                st.rerun()
-
-            # Delete button
-            if cols[6].button(f"Delete_{idx}"):
-                df_exp = df_exp.drop(idx).reset_index(drop=True)
-                save_expenses(df_exp)
-                st.success(f"Deleted expense (ID: {idx})")
-                st.rerun()
+        limit, offset = paginate("exp", exp_total, repr(sorted(exp_filters.items())))
+        page_exp = query_expenses(**exp_filters, limit=limit, offset=offset)
+        with st.form("exp_table_form"):
+            originals = {}
+            for idx, row in page_exp.iterrows():
+                shown = staged_row('expenses', row, idx)
+                cols = st.columns([2, 2, 2, 2, 3, 1, 1])
+                cols[0].write(row['Date'].date())
+                cols[1].write(row['Category'])
+                cols[2].write(row['Subcategory'])
+                # Inline editable amount
+                cols[3].number_input(f"Amount_{idx}", min_value=0.0, value=float(shown['Amount']), key=f"exp_amt_{idx}")
+                cols[4].text_input(f"Notes_{idx}", value=shown['Notes'], key=f"exp_notes_{idx}")
+                cols[5].selectbox(f"Status_{idx}", options=["Paid", "Pending"], index=0 if shown['Status']=='Paid' else 1, key=f"exp_status_{idx}")
+                cols[6].checkbox(f"Delete_{idx}", value=staged_delete('expenses', idx), key=f"exp_del_{idx}")
+                originals[idx] = (float(row['Amount']), row['Notes'], row['Status'])
+            st.form_submit_button("Stage changes", on_click=stage_expense_edits, args=(originals,))
 
     # Pending expenses list with mark as paid
     st.subheader("Pending Expenses")
-    pending_exp = df_exp[df_exp['Status'] == 'Pending']
-    if pending_exp.empty:
+    overdue = job_result(scheduler, tenant, 'overdue', ledger.versions['expenses'])
+    if overdue and overdue['count']:
+        st.warning(f"⏰ {overdue['count']} pending expense(s) are past their date (₹{overdue['total']:,.2f})")
+    pending_total = count_expenses(status='Pending')
+    if pending_total == 0:
         st.info("No pending expenses.")
     else:
-        for idx, row in pending_exp.iterrows():
+        limit, offset = paginate("pending", pending_total, None)
+        for idx, row in query_expenses(status='Pending', limit=limit, offset=offset).iterrows():
             st.write(f"{row['Date'].date()} | ₹{row['Amount']} | {row['Category']} | {row['Subcategory']} | {row['Notes']}")
-            if st.button(f"Mark Paid: {idx}", key=f"mark_paid_{idx}"):
-                df_exp.at[idx, 'Status'] = 'Paid'
-                save_expenses(df_exp)
-                st.success("Marked as Paid")
-                st.rerun()
+            if ('expenses', idx) in staged_changes():
+                st.caption("📝 change staged")
+            else:
+                st.button(f"Mark Paid: {idx}", key=f"mark_paid_{idx}", on_click=mark_paid_clicked, args=(idx,))
 
+@sections.section('expense_charts', reads=['expenses', 'savings', 'totals'])
+def expense_charts_section():
     # Pie charts for Paid and Pending Expenses by Category
-    paid_exp = df_exp[df_exp['Status'] == 'Paid']
+    # (read from the running per-category totals)
+    paid_by_cat = ledger.aggregates.expenses_by_category('Paid')
+    pending_by_cat = ledger.aggregates.expenses_by_category('Pending')
     col1, col2 = st.columns(2)
     with col1:
         st.markdown("### Paid Expenses by Category")
-        if not paid_exp.empty:
-            fig1 = px.pie(paid_exp, names='Category', values='Amount')
-            st.plotly_chart(fig1, use_container_width=True)
+        if paid_by_cat:
+            fig1 = totals_pie(paid_by_cat)
+            with stage("chart.render"):
+                st.plotly_chart(fig1, use_container_width=True)
         else:
             st.info("No paid expenses to show.")
     with col2:
         st.markdown("### Pending Expenses by Category")
-        pending_exp = df_exp[df_exp['Status'] == 'Pending']
-        if not pending_exp.empty:
-            fig2 = px.pie(pending_exp, names='Category', values='Amount')
-            st.plotly_chart(fig2, use_container_width=True)
+        if pending_by_cat:
+            fig2 = totals_pie(pending_by_cat)
+            with stage("chart.render"):
+                st.plotly_chart(fig2, use_container_width=True)
         else:
             st.info("No pending expenses to show.")
 
-with tabs[1]:
+    st.markdown("### 🗓️ Monthly Report")
+    report = job_result(scheduler, tenant, 'monthly_report', (ledger.versions['expenses'], ledger.versions['savings']))
+    if report is None:
+        st.caption("The monthly report is being prepared…")
+    else:
+        st.dataframe(report['rows'], hide_index=True,
+                     column_config={col: st.column_config.NumberColumn(format="₹%.2f") for col in ('Paid', 'Pending', 'Invested')})
+
+# ----------- Savings tab -------------
+
+@sections.section('savings', reads=['savings', 'investment_types', 'staged.savings', 'savings_filters'])
+def savings_section():
+    investment_types = load_investment_types()
     st.header("📈 Savings & Investments")
+    period_metrics('savings', prefix="Invested · ")
 
-    # Filters for savings
+    # Filters for savings (the chart below reads them too)
     with st.expander("Filters"):
-        save_date_filter = st.date_input("Savings Date Range", [datetime(2000,1,1), datetime.today()])
-        save_inv_filter = st.multiselect("Investment Types", options=investment_types, default=investment_types)
-
+        save_date_filter = st.date_input("Savings Date Range", DEFAULT_DATE_RANGE, key="save_date_filter",
+                                         on_change=savings_filters_changed)
+        save_inv_filter = st.multiselect("Investment Types", options=investment_types, default=investment_types,
+                                         key="save_inv_filter", on_change=savings_filters_changed)
+
+    if len(save_date_filter) != 2:
+        st.info("Pick the end of the date range to see the investments.")
+        return
     s_start, s_end = save_date_filter
-    df_filtered_save = df_save[
-        (df_save['Date'] >= pd.to_datetime(s_start)) &
-        (df_save['Date'] <= pd.to_datetime(s_end))
-    ]
-    if save_inv_filter:
-        df_filtered_save = df_filtered_save[df_filtered_save['InvestmentType'].isin(save_inv_filter)]
+    save_filters = dict(start=s_start, end=s_end, investment_types=save_inv_filter)
+    bulk_panel('savings', investment_types, s_start, s_end, {'InvestmentType': save_inv_filter})
 
     # Add Investment
     st.subheader("Add Investment")
     with st.form("savings_form", clear_on_submit=True):
-        s_date = st.date_input("Date", value=datetime.now(), key="s_date")
-        s_type = st.selectbox("Investment Type", investment_types)
-        s_amount = st.number_input("Amount", min_value=0.0, format="%.2f", key="s_amount")
-        s_notes = st.text_input("Notes", key="s_notes")
+        st.date_input("Date", value=datetime.now(), key="s_date")
+        s_type = st.selectbox("Investment Type", investment_types, key="s_type")
+        st.number_input("Amount", min_value=0.0, format="%.2f", key="s_amount")
+        st.text_input("Notes", key="s_notes")
 
-        s_city = ""
-        s_area = ""
         if s_type == "Real Estate":
-            s_city = st.text_input("City", key="s_city")
-            s_area = st.text_input("Area", key="s_area")
-
-        s_submit = st.form_submit_button("Add Investment")
-
-    if s_submit:
-        new_inv = {
-            'Date': pd.to_datetime(s_date),
-            'InvestmentType': s_type,
-            'Amount': s_amount,
-            'City': s_city if s_type == "Real Estate" else "",
-            'Area': s_area if s_type == "Real Estate" else "",
-            'Notes': s_notes
-        }
-        df_save = pd.concat([df_save, pd.DataFrame([new_inv])], ignore_index=True)
-        save_savings(df_save)
-        st.success("Investment added!")
-        st.rerun()
+            st.text_input("City", key="s_city")
+            st.text_input("Area", key="s_area")
 
-    # Investments table with inline edit and delete
+        st.form_submit_button("Add Investment", on_click=add_saving_submitted, args=(s_type == "Real Estate",))
+
+    # Investments table, paged like the expenses table
     st.subheader("Investments Table")
-    if df_filtered_save.empty:
+    inv_total = count_savings(**save_filters)
+    if inv_total == 0:
         st.info("No investments match the current filters.")
     else:
-        for idx, row in df_filtered_save.sort_values(by='Date', ascending=False).iterrows():
-            cols = st.columns([2, 2, 2, 2, 2, 1])
-            cols[0].write(row['Date'].date())
-            cols[1].write(row['InvestmentType'])
-            new_amt = cols[2].number_input(f"Inv_Amount_{idx}", min_value=0.0, value=float(row['Amount']), key=f"inv_amt_{idx}")
-            notes_val = cols[3].text_input(f"Inv_Notes_{idx}", value=row['Notes'], key=f"inv_notes_{idx}")
-            city_val = row['City']
-            area_val = row['Area']
-            if row['InvestmentType'] == "Real Estate":
-                city_val = cols[4].text_input(f"City_{idx}", value=row['City'], key=f"inv_city_{idx}")
-                area_val = cols[5].text_input(f"Area_{idx}", value=row['Area'], key=f"inv_area_{idx}")
-            else:
-                cols[4].write("")
-                cols[5].write("")
-
-            # Save changes if any
-            if new_amt != row['Amount'] or notes_val != row['Notes'] or city_val != row['City'] or area_val != row['Area']:
-                df_save.at[idx, 'Amount'] = new_amt
-                df_save.at[idx, 'Notes'] = notes_val
+        limit, offset = paginate("inv", inv_total, repr(sorted(save_filters.items())))
+        page_save = query_savings(**save_filters, limit=limit, offset=offset)
+        with st.form("inv_table_form"):
+            originals = {}
+            for idx, row in page_save.iterrows():
+                shown = staged_row('savings', row, idx)
+                cols = st.columns([2, 2, 2, 2, 2, 2, 1])
+                cols[0].write(row['Date'].date())
+                cols[1].write(row['InvestmentType'])
+                cols[2].number_input(f"Inv_Amount_{idx}", min_value=0.0, value=float(shown['Amount']), key=f"inv_amt_{idx}")
+                cols[3].text_input(f"Inv_Notes_{idx}", value=shown['Notes'], key=f"inv_notes_{idx}")
                 if row['InvestmentType'] == "Real Estate":
-                    df_save.at[idx, 'City'] = city_val
-                    df_save.at[idx, 'Area'] = area_val
-                save_savings(df_save)
-                st.success(f"Investment updated (ID: {idx})")
-                st.rerun()
+                    cols[4].text_input(f"City_{idx}", value=shown['City'], key=f"inv_city_{idx}")
+                    cols[5].text_input(f"Area_{idx}", value=shown['Area'], key=f"inv_area_{idx}")
+                else:
+                    cols[4].write("")
+                    cols[5].write("")
+                cols[6].checkbox(f"Delete_Inv_{idx}", value=staged_delete('savings', idx), key=f"inv_del_{idx}")
+                originals[idx] = (row['InvestmentType'], float(row['Amount']), row['Notes'], row['City'], row['Area'])
+            st.form_submit_button("Stage changes", on_click=stage_saving_edits, args=(originals,))
+
+@sections.section('savings_chart', reads=['savings', 'investment_types', 'savings_filters'])
+def savings_chart_section():
+    # Pie chart for investments by type
+    filters = savings_filter_values()
+    inv_by_type = investment_type_totals(*filters) if filters else None
+    if inv_by_type:
+        fig3 = totals_pie(inv_by_type, title="Investments by Type")
+        with stage("chart.render"):
+            st.plotly_chart(fig3, use_container_width=True)
+
+# ----------- Layout -------------
+
+with st.sidebar:
+    if tenant != DEFAULT_TENANT:
+        st.caption(f"Workspace: {tenant}")
+    base_balance_section()
+    st.markdown("---")
+    categories_section()
+    st.markdown("---")
+    investment_types_section()
+    st.markdown("---")
+    verify_section()
+
+    # Recurring expenses, overdue items and the monthly report are prepared
+    # by the background scheduler
+    with st.expander("⏱️ Background jobs"):
+        st.metric("Queue depth", scheduler.queue_depth())
+        st.dataframe(job_stats(scheduler, tenant), hide_index=True)
+timer.mark("render.sidebar")
+
+balances_section()
+timer.mark("render.balances")
+
+changes_section()
 
-            # Delete button
-            if cols[-1].button(f"Delete_Inv_{idx}"):
-                df_save = df_save.drop(idx).reset_index(drop=True)
-                save_savings(df_save)
-                st.success(f"Deleted investment (ID: {idx})")
-                st.rerun()
+tabs = st.tabs(["Expenses", "Savings & Investments"])
 
-    # Pie chart for investments by type
-    if not df_filtered_save.empty:
-        fig3 = px.pie(df_filtered_save, names='InvestmentType', values='Amount', title="Investments by Type")
-        st.plotly_chart(fig3, use_container_width=True)
+with tabs[0]:
+    expenses_section()
+    expense_charts_section()
+    timer.mark("render.expenses")
+
+with tabs[1]:
+    savings_section()
+    savings_chart_section()
+    timer.mark("render.savings")
 
+# Cache hit/miss counters and write lock waits (rendered last so they include this run)
+with st.sidebar.expander("Storage Stats"):
+    st.table(cache_stats())
+    st.table(coordinator.metrics())
 
+timer.done("render.footer")
+profiler_panel(PAGE_NAME)
@@ -0,0 +1,4 @@
+# services/__init__.py
+# Shared storage and helper modules used by the pages.
+#
+# Kept outside of pages/ so Streamlit does not list them as pages.
@@ -0,0 +1,131 @@
+# services/aggregates.py
+# Running totals for the Financial Dashboard header and charts.
+#
+# Every ledger row adds its Amount to a few named totals. Inserts, updates
+# and deletes move those totals by deltas inside the same transaction, so
+# reading a balance is a dict lookup instead of a scan over the ledger.
+#
+# Names:
+#   expenses|<Category>|<Status>   sum of expenses per category and status
+#   savings|total                  sum of all savings / investments
+#   savings|type|<InvestmentType>  sum per investment type
+
+import math
+
+AGGREGATES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS aggregates (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+def row_contributions(table, row):
+    # {aggregate name: amount} that one row adds to the totals
+    amount = float(row['Amount'])
+    if table == 'expenses':
+        return {f"expenses|{row['Category']}|{row['Status']}": amount}
+    return {
+        'savings|total': amount,
+        f"savings|type|{row['InvestmentType']}": amount,
+    }
+
+
+def row_delta(table, old_row=None, new_row=None):
+    # deltas for replacing old_row by new_row (either may be None)
+    delta = {}
+    if old_row is not None:
+        for name, amount in row_contributions(table, old_row).items():
+            delta[name] = delta.get(name, 0.0) - amount
+    if new_row is not None:
+        for name, amount in row_contributions(table, new_row).items():
+            delta[name] = delta.get(name, 0.0) + amount
+    return {name: amount for name, amount in delta.items() if amount != 0}
+
+
+def frame_contributions(table, df):
+    # row_contributions summed over a whole DataFrame of new rows
+    if df.empty:
+        return {}
+    if table == 'expenses':
+        sums = df.groupby(['Category', 'Status'])['Amount'].sum()
+        return {f"expenses|{category}|{status}": float(amount) for (category, status), amount in sums.items()}
+    totals = {'savings|total': float(df['Amount'].sum())}
+    for inv_type, amount in df.groupby('InvestmentType')['Amount'].sum().items():
+        totals[f"savings|type|{inv_type}"] = float(amount)
+    return totals
+
+
+def recompute(conn):
+    # full recount straight from the ledger tables
+    totals = {}
+    for category, status, amount in conn.execute(
+            "SELECT Category, Status, TOTAL(Amount) FROM expenses GROUP BY Category, Status"):
+        totals[f"expenses|{category}|{status}"] = amount
+    for inv_type, amount in conn.execute(
+            "SELECT InvestmentType, TOTAL(Amount) FROM savings GROUP BY InvestmentType"):
+        totals[f"savings|type|{inv_type}"] = amount
+    totals['savings|total'] = conn.execute("SELECT TOTAL(Amount) FROM savings").fetchone()[0]
+    return totals
+
+
+class Aggregates:
+    def __init__(self, values=None):
+        self.values = dict(values or {})
+
+    @classmethod
+    def load(cls, conn):
+        return cls(conn.execute("SELECT name, value FROM aggregates").fetchall())
+
+    def write_delta(self, conn, delta):
+        # persist a delta inside the caller's transaction
+        conn.executemany(
+            "INSERT INTO aggregates (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            list(delta.items()),
+        )
+
+    def apply(self, delta):
+        # mirror a committed delta in memory
+        for name, amount in delta.items():
+            self.values[name] = self.values.get(name, 0.0) + amount
+
+    def replace(self, conn, totals):
+        conn.execute("DELETE FROM aggregates")
+        conn.executemany("INSERT INTO aggregates (name, value) VALUES (?, ?)", list(totals.items()))
+        self.values = dict(totals)
+
+    def mismatches(self, totals):
+        # {name: (stored, recomputed)} for totals that drifted
+        names = set(self.values) | set(totals)
+        return {
+            name: (self.values.get(name, 0.0), totals.get(name, 0.0))
+            for name in names
+            if not math.isclose(self.values.get(name, 0.0), totals.get(name, 0.0), abs_tol=0.005)
+        }
+
+    # ----------- Readers -------------
+
+    def get(self, name):
+        return self.values.get(name, 0.0)
+
+    def expense_total(self, category, status):
+        return self.get(f"expenses|{category}|{status}")
+
+    def expenses_by_category(self, status):
+        # {category: sum(Amount)} for one status
+        out = {}
+        for name, amount in self.values.items():
+            kind, _, rest = name.partition('|')
+            if kind != 'expenses':
+                continue
+            category, _, row_status = rest.rpartition('|')
+            if row_status == status and amount > 0.005:
+                out[category] = amount
+        return out
+
+    def savings_total(self):
+        return self.get('savings|total')
+
+    def savings_type_total(self, inv_type):
+        return self.get(f"savings|type|{inv_type}")
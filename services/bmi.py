@@ -0,0 +1,133 @@
+# services/bmi.py
+# BMI for one person or for a whole file of people (Health Tracker).
+#
+# A batch file is read in chunks; each chunk's BMI and category are
+# computed with numpy array operations (no per-row Python), appended to a
+# temporary result file and folded into running statistics (category
+# counts, a fixed-bin histogram, mean / min / max), so memory stays flat
+# however many rows the file has. numpy / pandas are only imported by the
+# batch functions.
+
+import bisect
+import math
+import tempfile
+
+CATEGORIES = ["Underweight", "Normal", "Overweight", "Obese"]
+BOUNDS = [18.5, 25.0, 30.0]        # lower bounds of Normal, Overweight, Obese
+
+# histogram bins of 1 BMI unit; values outside are clipped into the end bins
+HIST_MIN, HIST_MAX = 10, 60
+
+CHUNK_ROWS = 250_000
+
+
+def bmi(height_cm, weight_kg):
+    return weight_kg / (height_cm / 100) ** 2
+
+
+def category(value):
+    return CATEGORIES[bisect.bisect_right(BOUNDS, value)]
+
+# ----------- Batch -------------
+
+def bmi_codes(height_cm, weight_kg):
+    # (BMI array, category code array) for numpy arrays of heights / weights;
+    # rows with a missing or non-positive height / weight get NaN and -1
+    import numpy as np
+    height_cm = np.asarray(height_cm, dtype=np.float64)
+    weight_kg = np.asarray(weight_kg, dtype=np.float64)
+    valid = (height_cm > 0) & (weight_kg > 0)
+    values = np.full(len(height_cm), np.nan)
+    values[valid] = weight_kg[valid] / (height_cm[valid] / 100) ** 2
+    codes = np.full(len(height_cm), -1, dtype=np.int8)
+    codes[valid] = np.searchsorted(BOUNDS, values[valid], side='right')
+    return values, codes
+
+
+class BmiStats:
+    def __init__(self):
+        import numpy as np
+        self.rows = 0
+        self.invalid = 0
+        self.counts = np.zeros(len(CATEGORIES), dtype=np.int64)
+        self.histogram = np.zeros(HIST_MAX - HIST_MIN, dtype=np.int64)
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, values, codes):
+        import numpy as np
+        valid = codes >= 0
+        good = values[valid]
+        self.rows += len(values)
+        self.invalid += int((~valid).sum())
+        self.counts += np.bincount(codes[valid], minlength=len(CATEGORIES))
+        bins = np.clip(good.astype(np.int64), HIST_MIN, HIST_MAX - 1) - HIST_MIN
+        self.histogram += np.bincount(bins, minlength=len(self.histogram))
+        if len(good):
+            self.total += float(good.sum())
+            self.min = min(self.min, float(good.min()))
+            self.max = max(self.max, float(good.max()))
+
+    @property
+    def valid(self):
+        return self.rows - self.invalid
+
+    @property
+    def mean(self):
+        return self.total / self.valid if self.valid else math.nan
+
+    def category_counts(self):
+        return dict(zip(CATEGORIES, self.counts.tolist()))
+
+    def histogram_bins(self):
+        # {'10-11': n, ...}; the first / last bin also hold the values below / above
+        return {f"{HIST_MIN + i}-{HIST_MIN + i + 1}": int(n) for i, n in enumerate(self.histogram)}
+
+
+def _find_column(columns, word):
+    found = [c for c in columns if word in str(c).lower()]
+    if not found:
+        raise ValueError(f"No {word} column (expected a column name containing '{word}')")
+    return found[0]
+
+
+def process_file(source, chunk_rows=CHUNK_ROWS, progress=None):
+    # BMI and category for every row of a CSV with height (cm) and weight
+    # (kg) columns. Returns (BmiStats, temporary CSV of the input rows plus
+    # BMI and Category, rewound). progress(stats) is called after each chunk.
+    import numpy as np
+    import pandas as pd
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:  # pandas writes the CSV (several times slower)
+        pa = None
+    labels = np.array(CATEGORIES + [''], dtype=object)   # code -1 -> ''
+    stats = BmiStats()
+    out = tempfile.TemporaryFile()
+    writer = schema = None
+    # input columns stay text, so they are written back exactly as read
+    for chunk in pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False):
+        height_col = _find_column(chunk.columns, 'height')
+        weight_col = _find_column(chunk.columns, 'weight')
+        values, codes = bmi_codes(pd.to_numeric(chunk[height_col], errors='coerce').to_numpy(),
+                                  pd.to_numeric(chunk[weight_col], errors='coerce').to_numpy())
+        stats.add(values, codes)
+        chunk['BMI'] = values.round(2)
+        chunk['Category'] = labels[codes]
+        if pa is not None:
+            batch = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = batch.schema
+                writer = pa_csv.CSVWriter(out, schema)
+            writer.write_table(batch.cast(schema))
+        else:
+            out.write(chunk.to_csv(index=False, header=writer is None).encode())
+            writer = True
+        if progress:
+            progress(stats)
+    if pa is not None and writer is not None:
+        writer.close()
+    out.seek(0)
+    return stats, out
@@ -0,0 +1,201 @@
+# services/bulk_io.py
+# Bulk CSV / Parquet import and export for the Financial Dashboard ledger.
+#
+# Imports stream the file in chunks: every chunk is normalized to the
+# table's columns, rows that cannot be stored are rejected with a reason,
+# unknown categories / investment types are mapped (or added to the
+# settings), rows repeated in the file are dropped, and the rest goes to
+# the ledger in one transaction per chunk (which also skips rows already
+# in the ledger and keeps the running totals in sync).
+#
+# Exports read the filtered rows chunk by chunk from the ledger and write
+# them to a temporary file, so the whole table is never held in memory.
+
+import os
+import re
+import tempfile
+
+import pandas as pd
+
+from services.ledger import DATE_FORMAT, TABLE_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV only
+    pa = pq = None
+
+PARQUET_AVAILABLE = pq is not None
+FORMATS = ['csv', 'parquet'] if PARQUET_AVAILABLE else ['csv']
+
+STATUSES = ['Paid', 'Pending']
+
+# column that must hold a known value, and the setting that lists them
+LOOKUP_COLUMN = {'expenses': 'Category', 'savings': 'InvestmentType'}
+LOOKUP_SETTING = {'expenses': 'categories', 'savings': 'investment_types'}
+REQUIRED_COLUMNS = {
+    'expenses': ['Date', 'Category', 'Amount'],
+    'savings': ['Date', 'InvestmentType', 'Amount'],
+}
+
+MAX_REJECTED_SAMPLES = 100
+
+
+def file_format(name):
+    ext = os.path.splitext(name or '')[1].lower()
+    return 'parquet' if ext in ('.parquet', '.pq') else 'csv'
+
+
+def _column_key(name):
+    # 'Investment Type', 'investment_type' and 'InvestmentType' all match
+    return re.sub(r'[\s_]', '', str(name).lower())
+
+# ----------- Import -------------
+
+def read_chunks(source, fmt, chunk_rows=10_000):
+    # DataFrames of at most chunk_rows rows from a path or file object
+    if fmt == 'parquet':
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Parquet import needs pyarrow")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+
+
+def _text(series):
+    return series.astype(object).where(series.notna(), '').astype(str).str.strip()
+
+
+def normalize_chunk(table, df, known, category_map=None, unknown=None):
+    # Returns (rows ready for Ledger.insert_many, rejected rows with a
+    # 'Reason' column, number of mapped lookup values).
+    cols = TABLE_COLUMNS[table]
+    by_key = {_column_key(c): c for c in cols}
+    df = df.rename(columns={c: by_key[_column_key(c)] for c in df.columns if _column_key(c) in by_key})
+    missing = [c for c in REQUIRED_COLUMNS[table] if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    raw = df.reindex(columns=cols)
+
+    out = pd.DataFrame(index=raw.index)
+    dates = pd.to_datetime(raw['Date'], errors='coerce')
+    out['Date'] = dates.dt.strftime(DATE_FORMAT)
+    amounts = pd.to_numeric(raw['Amount'], errors='coerce')
+    out['Amount'] = amounts.astype('float64')
+    for col in cols:
+        if col not in ('Date', 'Amount'):
+            out[col] = _text(raw[col])
+
+    reason = pd.Series('', index=raw.index)
+    reason[dates.isna()] = 'invalid Date'
+    reason[(reason == '') & (amounts.isna() | (amounts < 0))] = 'invalid Amount'
+
+    if table == 'expenses':
+        status = out['Status'].str.title().replace('', 'Paid')
+        reason[(reason == '') & ~status.isin(STATUSES)] = 'invalid Status'
+        out['Status'] = status
+
+    lookup = LOOKUP_COLUMN[table]
+    if category_map:
+        out[lookup] = out[lookup].replace(category_map)
+    reason[(reason == '') & (out[lookup] == '')] = f"missing {lookup}"
+    mapped = 0
+    if unknown is not None:
+        is_unknown = (reason == '') & ~out[lookup].isin(known)
+        out.loc[is_unknown, lookup] = unknown
+        mapped = int(is_unknown.sum())
+
+    bad = reason != ''
+    rejected = raw[bad].assign(Reason=reason[bad])
+    return out[~bad][cols], rejected, mapped
+
+
+def import_file(ledger, table, source, known, fmt='csv', category_map=None, unknown=None,
+                chunk_rows=10_000, progress=None):
+    # Import `source` into `table`. known: the current categories (expenses)
+    # or investment types (savings); values outside it are replaced by
+    # `unknown`, or added to the settings when unknown is None.
+    # progress(report) is called after every committed chunk.
+    report = {'rows': 0, 'inserted': 0, 'duplicates': 0, 'rejected': 0, 'mapped': 0,
+              'new_values': [], 'rejected_samples': []}
+    known = list(known)
+    seen = set()   # the rows already taken from this file
+    for chunk in read_chunks(source, fmt, chunk_rows):
+        rows, rejected, mapped = normalize_chunk(table, chunk, known, category_map, unknown)
+        report['rows'] += len(chunk)
+        report['rejected'] += len(rejected)
+        report['mapped'] += mapped
+        room = MAX_REJECTED_SAMPLES - len(report['rejected_samples'])
+        if room > 0:
+            report['rejected_samples'] += rejected.head(room).astype(str).to_dict('records')
+
+        keep = []
+        for row in rows.to_numpy(dtype=object).tolist():
+            # the row itself, not its hash: a hash collision would drop a
+            # distinct row as a duplicate
+            key = tuple(row)
+            keep.append(key not in seen)
+            seen.add(key)
+        report['duplicates'] += keep.count(False)
+        rows = rows[keep]
+
+        _add_lookup_values(ledger, table, rows, known, report)
+        inserted = ledger.insert_many(table, rows)
+        report['duplicates'] += len(rows) - inserted
+        report['inserted'] += inserted
+        if progress:
+            progress(report)
+    return report
+
+
+def _add_lookup_values(ledger, table, rows, known, report):
+    # store categories / investment types (and subcategories) seen for the first time
+    lookup = LOOKUP_COLUMN[table]
+    new_values = [v for v in rows[lookup].unique() if v not in known]
+    if new_values:
+        ledger.update_setting(LOOKUP_SETTING[table], lambda values: values + [v for v in new_values if v not in values], known)
+        known.extend(new_values)
+        report['new_values'] += new_values
+    if table == 'expenses':
+        pairs = rows.loc[rows['Subcategory'] != '', ['Category', 'Subcategory']].drop_duplicates()
+        if not pairs.empty:
+            def update(subs):
+                subs = {cat: list(items) for cat, items in subs.items()}
+                for cat, sub in pairs.itertuples(index=False, name=None):
+                    current = subs.setdefault(cat, [])
+                    if sub not in current:
+                        current.append(sub)
+                return subs
+            ledger.update_setting('subcategories', update, {})
+
+# ----------- Export -------------
+
+def export_file(ledger, table, fmt='csv', start=None, end=None, where=None, chunk_rows=50_000):
+    # Write the matching rows (oldest first) to a temporary file and return
+    # it rewound; the file is deleted once closed.
+    out = tempfile.TemporaryFile()
+    chunks = ledger.iter_query(table, start, end, where, chunk_rows=chunk_rows)
+    if fmt == 'parquet':
+        if not PARQUET_AVAILABLE:
+            raise ImportError("Parquet export needs pyarrow")
+        writer = None
+        for chunk in chunks:
+            chunk['Date'] = pd.to_datetime(chunk['Date'], format=DATE_FORMAT)
+            batch = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, batch.schema)
+            writer.write_table(batch.cast(writer.schema))
+        if writer is None:
+            empty = pd.DataFrame(columns=TABLE_COLUMNS[table])
+            writer = pq.ParquetWriter(out, pa.Table.from_pandas(empty, preserve_index=False).schema)
+        writer.close()
+    else:
+        header = True
+        for chunk in chunks:
+            out.write(chunk.to_csv(index=False, header=header).encode())
+            header = False
+        if header:
+            out.write((','.join(TABLE_COLUMNS[table]) + '\n').encode())
+    out.seek(0)
+    return out
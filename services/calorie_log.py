@@ -0,0 +1,180 @@
+# services/calorie_log.py
+# Append-only, per-day partitioned storage for the Health Tracker calories.
+#
+# Adding a meal appends one JSON line to a log file. Entries are grouped
+# by day: each day has its own partition file under days/, and the daily
+# totals are kept in a small rollups file, so trend charts never read raw
+# entries and "today" only loads today's partition.
+#
+# Once the log grows past `compact_every` records, a background thread
+# folds it into the affected day partitions and the rollups. Startup loads
+# the rollups and replays the log tail. Every record carries a sequence
+# number and each partition stores the last one it contains, so replaying
+# a log that was already folded in (e.g. after a crash mid-compaction) is
+# harmless.
+
+import json
+import os
+import threading
+from contextlib import suppress
+from datetime import date, datetime
+
+from services.profiler import count_bytes
+from services.write_coordinator import coordinator
+
+
+class CalorieLog:
+    def __init__(self, data_dir, legacy_path=None, compact_every=500):
+        self.data_dir = data_dir
+        self.days_dir = os.path.join(data_dir, 'days')
+        self.log_path = os.path.join(data_dir, 'log.jsonl')
+        self.rollups_path = os.path.join(data_dir, 'rollups.json')
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._compacting = False
+        self._days = {}          # day -> {'entries': [...], 'seq': n}, loaded lazily
+        self._dirty = set()      # days changed since the last compaction
+        self.rollups = {}        # day -> total calories
+        self.seq = 0
+        self._log_records = 0
+
+        os.makedirs(self.days_dir, exist_ok=True)
+        if os.path.exists(self.rollups_path):
+            with open(self.rollups_path, 'r') as f:
+                saved = json.load(f)
+            self.rollups = saved['totals']
+            self.seq = saved['seq']
+        self._replay()
+        if not self.seq and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+
+    # ----------- Partitions -------------
+
+    def _partition_path(self, day):
+        return os.path.join(self.days_dir, f"{day}.json")
+
+    def _day(self, day):
+        part = self._days.get(day)
+        if part is None:
+            path = self._partition_path(day)
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    part = json.load(f)
+                    count_bytes(read=f.tell())
+            else:
+                part = {'entries': [], 'seq': 0}
+            self._days[day] = part
+        return part
+
+    def entries(self, day=None):
+        # entries of one day (default: today); reads only that day's partition
+        day = str(day or date.today())
+        with self._lock:
+            return list(self._day(day)['entries'])
+
+    def day_total(self, day=None):
+        return self.rollups.get(str(day or date.today()), 0)
+
+    # ----------- Loading -------------
+
+    def _replay(self):
+        # older rotated log first, in case a compaction was interrupted
+        rotated = self.log_path + '.compacting'
+        for path in (rotated, self.log_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn last line
+                    self._apply(record)
+                    self._log_records += 1
+        if os.path.exists(rotated):
+            # another process may be folding the same file; both are idempotent
+            self._fold(*self._take_dirty())
+            with suppress(FileNotFoundError):
+                os.remove(rotated)
+            self._log_records = 0
+
+    def _import_legacy(self, legacy_path):
+        # the old flat list has no dates; file it under the day it was last written
+        day = str(datetime.fromtimestamp(os.path.getmtime(legacy_path)).date())
+        with open(legacy_path, 'r') as f:
+            items = json.load(f)
+        for item in items:
+            self._apply({'op': 'add', 'day': day, 'ts': None, 'meal': item['meal'],
+                         'calories': item['calories'], 'seq': self.seq + 1})
+        self._fold(*self._take_dirty())
+
+    def _apply(self, record):
+        day = record['day']
+        part = self._day(day)
+        self.seq = max(self.seq, record['seq'])
+        if record['seq'] <= part['seq']:
+            # already folded into the partition; the rollups file may be older
+            self.rollups[day] = sum(item['calories'] for item in part['entries'])
+            return
+        if record['op'] == 'add':
+            part['entries'].append({'meal': record['meal'], 'calories': record['calories'], 'ts': record['ts']})
+            self.rollups[day] = self.rollups.get(day, 0) + record['calories']
+        elif record['op'] == 'clear':
+            part['entries'] = []
+            self.rollups.pop(day, None)
+        part['seq'] = record['seq']
+        self._dirty.add(day)
+
+    # ----------- Writing -------------
+
+    def _append(self, record):
+        with self._lock:
+            record['seq'] = self.seq + 1
+            coordinator.append_line(self.log_path, json.dumps(record))
+            self._apply(record)
+            self._log_records += 1
+            should_compact = self._log_records >= self.compact_every and not self._compacting
+            if should_compact:
+                self._compacting = True
+        if should_compact:
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def add(self, meal, calories, when=None):
+        when = when or datetime.now()
+        self._append({'op': 'add', 'day': str(when.date()), 'ts': when.isoformat(timespec='seconds'),
+                      'meal': meal, 'calories': calories})
+
+    def clear(self, day=None):
+        self._append({'op': 'clear', 'day': str(day or date.today())})
+
+    # ----------- Compaction -------------
+
+    def _take_dirty(self):
+        parts = {day: {'entries': list(self._days[day]['entries']), 'seq': self._days[day]['seq']}
+                 for day in self._dirty}
+        self._dirty = set()
+        return parts, {'seq': self.seq, 'totals': dict(self.rollups)}
+
+    def _fold(self, parts, rollups):
+        # partitions first, rollups last; a replayed record is skipped by
+        # any partition that already contains it
+        for day, part in parts.items():
+            coordinator.write_json(self._partition_path(day), part)
+        coordinator.write_json(self.rollups_path, rollups)
+
+    def compact(self):
+        # Fold the log into the day partitions. Only the log rotation holds
+        # the lock; new appends go to a fresh log while the files are written.
+        rotated = self.log_path + '.compacting'
+        try:
+            with self._lock:
+                parts, rollups = self._take_dirty()
+                with coordinator.lock(self.log_path):
+                    if os.path.exists(self.log_path):
+                        os.replace(self.log_path, rotated)
+                self._log_records = 0
+            self._fold(parts, rollups)
+            with suppress(FileNotFoundError):
+                os.remove(rotated)
+        finally:
+            self._compacting = False
@@ -0,0 +1,46 @@
+# services/data_access.py
+# Cached loaders shared by the pages.
+#
+# Ledger reads are keyed on the ledger's per-table write counters, so a
+# rerun where nothing changed is answered from st.cache_data without
+# touching disk. file_stamp() gives the (mtime, size) stamp the file-backed
+# stores use to notice changes.
+
+import os
+from collections import Counter
+
+import streamlit as st
+
+_calls = Counter()
+_misses = Counter()
+
+
+def cache_stats():
+    # {loader name: {'hits': n, 'misses': n}}
+    return {
+        name: {'hits': _calls[name] - _misses[name], 'misses': _misses[name]}
+        for name in sorted(_calls)
+    }
+
+
+def file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+# ----------- Ledger reads -------------
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _ledger_call(_ledger, ledger_token, table, version, method, args, kwargs):
+    _misses[f"ledger.{method}"] += 1
+    return getattr(_ledger, method)(*args, **kwargs)
+
+
+def ledger_read(ledger, table, method, *args, **kwargs):
+    # Cached ledger.<method>(*args, **kwargs). `table` names the data the
+    # call reads ('expenses', 'savings' or 'settings'); a write to that
+    # table bumps its version, so only reads of the written table miss.
+    _calls[f"ledger.{method}"] += 1
+    return _ledger_call(ledger, ledger.cache_token, table, ledger.versions[table], method, args, kwargs)
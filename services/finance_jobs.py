@@ -0,0 +1,127 @@
+# services/finance_jobs.py
+# Background jobs of the Financial Dashboard, run by services/scheduler.py.
+#
+# Per open ledger (tenant):
+#   recurring       post the recurring expenses that have fallen due
+#   overdue         Pending expenses dated before today, rolled up for the banner
+#   aggregates      pick up other processes' writes and check the running totals
+#   monthly_report  paid / pending / invested per month for the last year
+# The page reads the results with job_result() and triggers a job when
+# its result was computed at an older ledger version.
+
+import time
+import weakref
+from itertools import count
+
+import pandas as pd
+
+from services.ledger import last_days
+from services.scheduler import JobGone
+
+# seconds between runs
+JOB_INTERVALS = {
+    'recurring': 3600,
+    'overdue': 600,
+    'aggregates': 300,
+    'monthly_report': 900,
+}
+
+REPORT_MONTHS = 12
+OVERDUE_SAMPLE = 20
+VERIFY_EVERY = 12   # full recount of the running totals every 12th aggregates run
+
+
+def job_key(tenant, name):
+    return f"{tenant}:{name}"
+
+
+def post_recurring(ledger, today=None):
+    return {'posted': ledger.materialize_recurring(today), 'version': ledger.versions['expenses']}
+
+
+def overdue_pending(ledger, today=None):
+    # Pending expenses dated before today: count, total and the newest
+    # OVERDUE_SAMPLE of them
+    yesterday, _ = last_days(2, today)
+    where = {'Status': 'Pending'}
+    version = ledger.versions['expenses']
+    summary = ledger.summary('expenses', None, yesterday, where)
+    rows = ledger.query('expenses', None, yesterday, where, limit=OVERDUE_SAMPLE)
+    return {**summary, 'rows': rows, 'version': version}
+
+
+def refresh_aggregates(ledger, verify=False):
+    # reload what other processes wrote; warm the in-memory indexes so the
+    # next filtered read does not build them
+    changed = ledger.refresh()
+    repaired = len(ledger.verify_aggregates(repair=True)) if verify else 0
+    for table in ('expenses', 'savings'):
+        ledger.count(table)
+    return {'changed': changed, 'repaired': repaired}
+
+
+def monthly_report(ledger, months=REPORT_MONTHS, today=None):
+    # one row per month, newest first
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    version = (ledger.versions['expenses'], ledger.versions['savings'])
+    rows = []
+    for month in pd.period_range(end=today.to_period('M'), periods=months, freq='M')[::-1]:
+        start, end = month.start_time, month.end_time.normalize()
+        paid = ledger.summary('expenses', start, end, {'Status': 'Paid'})
+        pending = ledger.summary('expenses', start, end, {'Status': 'Pending'})
+        by_category = ledger.group_totals('expenses', 'Category', start, end)
+        rows.append({
+            'Month': str(month),
+            'Paid': paid['total'],
+            'Pending': pending['total'],
+            'Invested': ledger.summary('savings', start, end)['total'],
+            'Entries': paid['count'] + pending['count'],
+            'Top category': max(by_category, key=by_category.get) if by_category else '',
+        })
+    return {'rows': pd.DataFrame(rows), 'version': version}
+
+
+def _job(ref, func):
+    # run func on the ledger behind the weak reference; drop the job once
+    # the tenant registry has let go of the ledger
+    def run():
+        ledger = ref()
+        if ledger is None:
+            raise JobGone
+        return func(ledger)
+    return run
+
+
+def schedule_ledger_jobs(scheduler, tenant, ledger):
+    # (re)register the jobs of `ledger`; cheap to call on every rerun
+    ref = weakref.ref(ledger)
+    aggregate_runs = count(1)
+    funcs = {
+        'recurring': post_recurring,
+        'overdue': overdue_pending,
+        'aggregates': lambda led: refresh_aggregates(led, verify=next(aggregate_runs) % VERIFY_EVERY == 0),
+        'monthly_report': monthly_report,
+    }
+    for name, func in funcs.items():
+        scheduler.schedule(job_key(tenant, name), _job(ref, func), JOB_INTERVALS[name],
+                           kind=name, owner=ledger.cache_token)
+
+
+def job_result(scheduler, tenant, name, version=None):
+    # The job's last result. With `version`, a result computed at another
+    # ledger version triggers a new run (the stale result is still returned).
+    result = scheduler.result(job_key(tenant, name))
+    if version is not None and (result is None or result['version'] != version):
+        scheduler.trigger(job_key(tenant, name))
+    return result
+
+
+def job_stats(scheduler, tenant):
+    now = time.time()
+    return [{
+        'job': stat['kind'], 'runs': stat['runs'], 'errors': stat['errors'],
+        'last ms': round(stat['last_s'] * 1000, 1) if stat['last_s'] is not None else None,
+        'max ms': round(stat['max_s'] * 1000, 1),
+        'ran s ago': round(now - stat['last_run']) if stat['last_run'] else None,
+        'next in s': max(0, round(stat['next_run'] - now)),
+    } for stat in scheduler.stats() if stat['key'].startswith(f"{tenant}:")]
@@ -0,0 +1,75 @@
+# services/fragments.py
+# Pages split into independently rerunning sections.
+#
+# A section is an st.fragment with a key and the names of the data it
+# reads ('expenses', 'balance', ...). A widget inside a section reruns only
+# that section (Streamlit's default for fragments), so a widget that only
+# changes the section's own view needs nothing more. A write is made in a
+# widget callback that then calls notify() with what it changed: that
+# reruns exactly the sections reading it (st.rerun with their keys)
+# instead of the whole script.
+#
+# Callbacks run before any section is drawn, so their messages ("Expense
+# added!") are kept with flash() and shown at the top of the section the
+# next time it runs. Each section run is timed as the profiler stage
+# "section.<name>" of the page; a fragment-only rerun runs on a fresh
+# script thread that PageTimer never saw, so the section starts the
+# profiler run for the page itself.
+
+import functools
+
+import streamlit as st
+
+from services.profiler import begin_run, current_run, stage
+
+FLASH_KEY = "_section_flash"
+
+
+class Sections:
+    def __init__(self, prefix, page=None):
+        # prefix: keeps the fragment keys of different pages apart
+        # page: the profiler page the section stages are recorded under
+        self.prefix = prefix
+        self.page = page
+        self.reads = {}   # fragment key -> frozenset of data names
+
+    def key(self, name):
+        return f"{self.prefix}.{name}"
+
+    def section(self, name, reads=(), **fragment_kwargs):
+        # decorator: the function becomes the fragment `name`
+        key = self.key(name)
+        self.reads[key] = frozenset(reads)
+
+        def decorate(func):
+            @functools.wraps(func)
+            def run(*args, **kwargs):
+                if self.page is not None and current_run() is None:
+                    begin_run(self.page)
+                with stage(f"section.{name}"):
+                    show_flash(key)
+                    return func(*args, **kwargs)
+            return st.fragment(run, key=key, **fragment_kwargs)
+        return decorate
+
+    def readers(self, names):
+        names = set(names)
+        return sorted(key for key, reads in self.reads.items() if reads & names)
+
+    def notify(self, *names, also=()):
+        # From a widget callback, after a write: rerun the sections reading
+        # any of `names`, plus the sections named in `also` (e.g. the one
+        # showing the callback's flash message). Call it last: the rerun
+        # replaces the interaction's default one.
+        keys = set(self.readers(names)) | {self.key(name) for name in also}
+        if keys:
+            st.rerun(sorted(keys))
+
+    def flash(self, name, kind, text):
+        # kind: an st message function name ('success', 'warning', ...)
+        st.session_state.setdefault(FLASH_KEY, {}).setdefault(self.key(name), []).append((kind, text))
+
+
+def show_flash(key):
+    for kind, text in st.session_state.get(FLASH_KEY, {}).pop(key, []):
+        getattr(st, kind)(text)
@@ -0,0 +1,120 @@
+# services/generator_store.py
+# Keyed, persistent dataset behind the Static Site Generators chart.
+#
+# One entry per generator, keyed by its case-folded name, so adding a
+# generator that is already there updates its star count in place
+# instead of adding a second bar. The entries live in one JSON file per
+# tenant; every write (a single entry or a bulk CSV load of thousands) is
+# one read-modify-write under the file lock, so concurrent sessions merge
+# their changes. The in-memory copy is reloaded only when the file's
+# stamp changes.
+#
+# The chart never gets the whole dataset: top() returns the N largest
+# entries plus one "Other" row summing the rest.
+
+import heapq
+import io
+import json
+import threading
+
+import pandas as pd
+
+from services.data_access import file_stamp
+from services.profiler import count_bytes
+from services.write_coordinator import coordinator
+
+OTHER = "Other"
+
+
+def _key(name):
+    return name.strip().casefold()
+
+
+class GeneratorStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> [display name, stars]
+        self._stamp = None
+
+    def _refresh(self):
+        # reload after another session / process wrote the file
+        stamp = file_stamp(self.path)
+        if stamp != self._stamp:
+            entries = {}
+            if stamp is not None:
+                with open(self.path, 'r') as f:
+                    entries = json.load(f)
+                count_bytes(read=stamp[1])
+            self._entries, self._stamp = entries, stamp
+
+    def _write(self, update):
+        # update(entries) mutates the entries in place, under the file lock
+        def apply(data):
+            update(data)
+            return data
+        with self._lock:
+            self._entries = coordinator.update_json(self.path, apply, {})
+            self._stamp = file_stamp(self.path)
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._entries)
+
+    # ----------- Writes -------------
+
+    def upsert(self, name, stars):
+        # True if `name` was new
+        added = []
+        def update(entries):
+            added.append(_key(name) not in entries)
+            entries[_key(name)] = [name.strip(), float(stars)]
+        self._write(update)
+        return added[0]
+
+    def upsert_many(self, rows):
+        # rows: iterable of (name, stars); a name repeated in `rows` keeps its
+        # last value. Returns (added, updated).
+        latest = {}
+        for name, stars in rows:
+            latest[_key(name)] = [name.strip(), float(stars)]
+        counts = {}
+        def update(entries):
+            counts['added'] = sum(1 for key in latest if key not in entries)
+            entries.update(latest)
+        self._write(update)
+        return counts['added'], len(latest) - counts['added']
+
+    def clear(self):
+        self._write(lambda entries: entries.clear())
+
+    # ----------- Reads -------------
+
+    def top(self, n):
+        # ([(name, stars)] of the n largest, largest first; "Other" row or None)
+        with self._lock:
+            self._refresh()
+            entries = list(self._entries.values())
+        largest = heapq.nlargest(n, entries, key=lambda e: e[1])
+        if len(entries) <= n:
+            return [tuple(e) for e in largest], None
+        rest = sum(e[1] for e in entries) - sum(e[1] for e in largest)
+        return [tuple(e) for e in largest], (f"{OTHER} ({len(entries) - n})", rest)
+
+
+def parse_upload(data):
+    # ([(name, stars)], rows skipped) from CSV bytes with a name column
+    # and a stars column (the first two columns if they are not named so);
+    # rows without a name or with an invalid star count are skipped
+    count_bytes(read=len(data))
+    df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    if len(df.columns) < 2:
+        raise ValueError("Expected a generator name column and a stars column")
+    lowered = {c.lower(): c for c in df.columns}
+    name_col = next((lowered[c] for c in lowered if c.startswith(('generator', 'name'))), df.columns[0])
+    stars_col = next((lowered[c] for c in lowered if c.startswith('stars')), df.columns[1])
+    names = df[name_col].str.strip()
+    stars = pd.to_numeric(df[stars_col], errors='coerce')
+    valid = (names != '') & stars.notna() & (stars >= 0)
+    return list(zip(names[valid].tolist(), stars[valid].tolist())), int((~valid).sum())
@@ -0,0 +1,570 @@
+# services/ledger.py
+# SQLite storage engine for the Financial Dashboard.
+#
+# Expenses, savings and the small config values (categories, subcategories,
+# investment types, base balance) all live in one WAL-mode database, so an
+# add / edit / delete touches a single row instead of rewriting a whole CSV.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+from services.aggregates import AGGREGATES_SCHEMA, Aggregates, frame_contributions, recompute, row_delta
+from services.ledger_index import INDEXED_COLUMNS, TableIndex
+from services.recurring import due_rows
+from services.snapshot import SNAPSHOTS_AVAILABLE, dictionary_columns, read_snapshot, snapshot_version, write_snapshot
+from services.write_coordinator import coordinator
+
+EXPENSE_COLUMNS = ['Date', 'Category', 'Subcategory', 'Amount', 'Notes', 'Status']
+SAVINGS_COLUMNS = ['Date', 'InvestmentType', 'Amount', 'City', 'Area', 'Notes']
+
+TABLE_COLUMNS = {
+    'expenses': EXPENSE_COLUMNS,
+    'savings': SAVINGS_COLUMNS,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY,
+    Date TEXT NOT NULL,
+    Category TEXT NOT NULL DEFAULT '',
+    Subcategory TEXT NOT NULL DEFAULT '',
+    Amount REAL NOT NULL DEFAULT 0,
+    Notes TEXT NOT NULL DEFAULT '',
+    Status TEXT NOT NULL DEFAULT 'Paid'
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(Date);
+CREATE INDEX IF NOT EXISTS idx_expenses_status ON expenses(Status);
+CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses(Category);
+CREATE INDEX IF NOT EXISTS idx_expenses_date_amount ON expenses(Date, Amount);
+
+CREATE TABLE IF NOT EXISTS savings (
+    id INTEGER PRIMARY KEY,
+    Date TEXT NOT NULL,
+    InvestmentType TEXT NOT NULL DEFAULT '',
+    Amount REAL NOT NULL DEFAULT 0,
+    City TEXT NOT NULL DEFAULT '',
+    Area TEXT NOT NULL DEFAULT '',
+    Notes TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_savings_date ON savings(Date);
+CREATE INDEX IF NOT EXISTS idx_savings_type ON savings(InvestmentType);
+CREATE INDEX IF NOT EXISTS idx_savings_date_amount ON savings(Date, Amount);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+-- write counter per table, bumped by every committing transaction
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+# Dates are stored as 'YYYY-MM-DD' text so range filters are plain string
+# comparisons that can use the Date index.
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def format_date(value):
+    return pd.Timestamp(value).strftime(DATE_FORMAT)
+
+
+def last_days(days, today=None):
+    # (start, end) of the `days` days up to and including today
+    end = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    return end - pd.Timedelta(days=days - 1), end
+
+
+def month_to_date(today=None):
+    end = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    return end.replace(day=1), end
+
+
+def _clean_row(table, row):
+    # normalize a row dict to the column types stored in the table
+    clean = {}
+    for col in TABLE_COLUMNS[table]:
+        if col not in row:
+            continue
+        val = row[col]
+        if col == 'Date':
+            val = format_date(val)
+        elif col == 'Amount':
+            val = float(val) if pd.notna(val) else 0.0
+        else:
+            val = '' if val is None or (isinstance(val, float) and pd.isna(val)) else str(val)
+        clean[col] = val
+    return clean
+
+
+class Ledger:
+    def __init__(self, db_path, legacy_files=None):
+        self.db_path = db_path
+        # identifies this open ledger in caches; a reopened file starts its
+        # write counters at 0 again, so db_path alone is not enough
+        self.cache_token = f"{db_path}#{uuid.uuid4().hex}"
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # other processes writing the same file wait for the lock instead of failing
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.executescript(SCHEMA + AGGREGATES_SCHEMA)
+        self._delta = {}
+        self._touched = set()
+        self._changes = []
+        self._indexes = {}   # table -> TableIndex, built on the first filtered read
+        # per-table write counters, bumped on commit; readers use them as cache keys
+        self.versions = {'expenses': 0, 'savings': 0, 'settings': 0}
+        self.versions.update(self._conn.execute("SELECT name, version FROM table_versions").fetchall())
+        self.aggregates = Aggregates.load(self._conn)
+        if legacy_files and self.get_setting('legacy_imported') is None:
+            self.import_legacy(legacy_files)
+        if self.get_setting('aggregates_built') is None:
+            self.rebuild_aggregates()
+
+    @contextmanager
+    def _transaction(self):
+        # Writers are serialized by the connection lock and SQLite's write
+        # lock (BEGIN IMMEDIATE); the time spent waiting for both is recorded.
+        started = time.perf_counter()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            coordinator.record_wait(self.db_path, time.perf_counter() - started)
+            self._delta = {}
+            self._touched = set()
+            self._changes = []
+            try:
+                yield self._conn
+                if self._delta:
+                    self.aggregates.write_delta(self._conn, self._delta)
+                self._conn.executemany(
+                    "INSERT INTO table_versions (name, version) VALUES (?, 1) "
+                    "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+                    [(table,) for table in self._touched],
+                )
+                versions = {table: self.table_version(table, self._conn) for table in self._touched}
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self.aggregates.apply(self._delta)
+            self._apply_to_indexes(versions)
+            self.versions.update(versions)
+
+    def _track(self, table, old_row=None, new_row=None):
+        # collect the aggregate delta of one row change in the open transaction
+        self._touched.add(table)
+        self._changes.append((table, old_row, new_row))
+        for name, amount in row_delta(table, old_row, new_row).items():
+            self._delta[name] = self._delta.get(name, 0.0) + amount
+
+    def _apply_to_indexes(self, versions):
+        # Mirror the committed row changes in the in-memory indexes. An index
+        # that missed a write (another process, or an untracked bulk write)
+        # is dropped and rebuilt on its next read.
+        for table, version in versions.items():
+            index = self._indexes.get(table)
+            if index is None:
+                continue
+            if index.version != version - 1:
+                del self._indexes[table]
+                continue
+            for change_table, old_row, new_row in self._changes:
+                if change_table != table:
+                    continue
+                if isinstance(new_row, pd.DataFrame):
+                    index.insert_many(old_row, new_row)
+                elif new_row is None:
+                    index.delete(old_row['id'])
+                elif old_row is None:
+                    index.insert(new_row)
+                else:
+                    index.update(new_row)
+            index.version = version
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ----------- Settings (categories, balance, ...) -------------
+
+    def get_setting(self, key, default=None):
+        with self._lock:
+            cur = self._conn.execute("SELECT value FROM settings WHERE key = ?", (key,))
+            found = cur.fetchone()
+        return json.loads(found[0]) if found else default
+
+    def set_setting(self, key, value):
+        with self._transaction() as conn:
+            self._put_setting(conn, key, value)
+
+    def update_setting(self, key, update, default=None):
+        # read-modify-write in one transaction, so concurrent sessions
+        # editing the same list merge their changes instead of clobbering
+        with self._transaction() as conn:
+            found = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+            value = update(json.loads(found[0]) if found else default)
+            self._put_setting(conn, key, value)
+        return value
+
+    def _put_setting(self, conn, key, value):
+        self._touched.add('settings')
+        conn.execute(
+            "INSERT INTO settings (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value)),
+        )
+
+    # ----------- Row level access -------------
+
+    def load_table(self, table, columns=None):
+        # Whole table indexed by row id, optionally only some `columns`.
+        # Read from the table's columnar snapshot (typed, memory-mapped),
+        # which is rewritten first if the table changed since it was taken.
+        if not SNAPSHOTS_AVAILABLE:
+            return self._load_table_sql(table, columns)
+        path = self.snapshot_path(table)
+        if snapshot_version(path) != self.table_version(table):
+            with coordinator.lock(path):
+                self._write_snapshot(table, path)
+        return read_snapshot(path, columns)
+
+    def _load_table_sql(self, table, columns=None):
+        cols = ', '.join(['id'] + [c for c in (columns or TABLE_COLUMNS[table]) if c != 'id'])
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT {cols} FROM {table} ORDER BY id", self._conn, index_col='id')
+        if 'Date' in df:
+            df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+        return df
+
+    # ----------- Columnar snapshots -------------
+
+    def table_version(self, table, conn=None):
+        # persistent write counter of `table`, shared by every process using the file
+        if conn is None:
+            with self._lock:
+                return self.table_version(table, self._conn)
+        found = conn.execute("SELECT version FROM table_versions WHERE name = ?", (table,)).fetchone()
+        return found[0] if found else 0
+
+    def snapshot_path(self, table):
+        directory = os.path.join(os.path.dirname(os.path.abspath(self.db_path)), 'snapshots')
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{os.path.basename(self.db_path)}.{table}.arrow")
+
+    def _write_snapshot(self, table, path):
+        # rows, labels and version all come from one read transaction
+        with self._read_connection() as conn:
+            version = self.table_version(table, conn)
+            if snapshot_version(path) == version:
+                return  # written meanwhile by another session
+            labels = {col: [v for (v,) in conn.execute(f"SELECT DISTINCT {col} FROM {table} ORDER BY {col}")]
+                      for col in dictionary_columns(table)}
+            chunks = pd.read_sql_query(f"SELECT id, {', '.join(TABLE_COLUMNS[table])} FROM {table} ORDER BY id",
+                                       conn, chunksize=50_000)
+            coordinator.write_stream(path, lambda f: write_snapshot(f, table, chunks, labels, version, DATE_FORMAT))
+
+    @contextmanager
+    def _read_connection(self):
+        # separate connection reading one consistent snapshot of the file,
+        # so long reads neither hold the ledger lock nor block writers
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("BEGIN")
+            yield conn
+        finally:
+            conn.close()
+
+    # ----------- Filtered queries -------------
+    # Filters on Date and the label columns run on the in-memory index
+    # (services/ledger_index.py), which yields the matching row ids; only
+    # the rows actually returned are read from SQLite. Filters on other
+    # columns are pushed down into SQL.
+    # where: {column: value or list of values}; None / empty lists are ignored.
+
+    def _where_clause(self, table, start=None, end=None, where=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("Date >= ?")
+            params.append(format_date(start))
+        if end is not None:
+            clauses.append("Date <= ?")
+            params.append(format_date(end))
+        for col, val in (where or {}).items():
+            if col not in TABLE_COLUMNS[table]:
+                raise ValueError(f"Unknown column '{col}' for table '{table}'")
+            if val is None:
+                continue
+            if isinstance(val, (list, tuple, set)):
+                if not val:
+                    continue
+                clauses.append(f"{col} IN ({', '.join('?' for _ in val)})")
+                params.extend(val)
+            else:
+                clauses.append(f"{col} = ?")
+                params.append(val)
+        sql = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return sql, params
+
+    def _index(self, table):
+        # the table's in-memory index; (re)built from the columnar snapshot
+        # when missing or when another process has written the table
+        version = self.table_version(table)
+        index = self._indexes.get(table)
+        if index is None or index.version != version:
+            df = self.load_table(table, ['Date', 'Amount'] + INDEXED_COLUMNS[table])
+            index = self._indexes[table] = TableIndex(table, df, version)
+        return index
+
+    def _select(self, table, start, end, where):
+        # (index, matching positions) when every filter column is indexed, else None
+        self._where_clause(table, start, end, where)  # validates the columns
+        if any(val not in (None, [], ()) and col not in INDEXED_COLUMNS[table] for col, val in (where or {}).items()):
+            return None
+        index = self._index(table)
+        return index, index.select(start, end, where)
+
+    def _rows_by_id(self, table, ids):
+        # rows in the order of `ids`
+        frames = []
+        for i in range(0, len(ids), 900):
+            chunk = [int(row_id) for row_id in ids[i:i + 900]]
+            frames.append(pd.read_sql_query(
+                f"SELECT * FROM {table} WHERE id IN ({', '.join('?' for _ in chunk)})",
+                self._conn, params=chunk, index_col='id'))
+        df = pd.concat(frames) if frames else pd.read_sql_query(f"SELECT * FROM {table} LIMIT 0", self._conn, index_col='id')
+        return df.reindex([int(row_id) for row_id in ids])
+
+    def query(self, table, start=None, end=None, where=None, limit=None, offset=0):
+        # matching rows, newest first, indexed by row id
+        with self._lock:
+            selected = self._select(table, start, end, where)
+            if selected is not None:
+                index, positions = selected
+                end_pos = None if limit is None else int(offset) + int(limit)
+                ordered = index.newest_first(positions, end_pos)[int(offset):end_pos]
+                df = self._rows_by_id(table, index.row_ids(ordered))
+            else:
+                sql, params = self._where_clause(table, start, end, where)
+                sql = f"SELECT * FROM {table}{sql} ORDER BY Date DESC, id DESC"
+                if limit is not None:
+                    sql += " LIMIT ? OFFSET ?"
+                    params += [int(limit), int(offset)]
+                df = pd.read_sql_query(sql, self._conn, params=params, index_col='id')
+        df['Date'] = pd.to_datetime(df['Date'], format=DATE_FORMAT)
+        return df
+
+    def count(self, table, start=None, end=None, where=None):
+        with self._lock:
+            selected = self._select(table, start, end, where)
+            if selected is not None:
+                return len(selected[1])
+            sql, params = self._where_clause(table, start, end, where)
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}{sql}", params).fetchone()[0]
+
+    def summary(self, table, start=None, end=None, where=None):
+        # {'count', 'total'} of the matching rows, e.g. over last_days(30)
+        # or month_to_date()
+        with self._lock:
+            selected = self._select(table, start, end, where)
+            if selected is not None:
+                index, positions = selected
+                return {'count': len(positions), 'total': index.total(positions)}
+            sql, params = self._where_clause(table, start, end, where)
+            count, total = self._conn.execute(f"SELECT COUNT(*), TOTAL(Amount) FROM {table}{sql}", params).fetchone()
+            return {'count': count, 'total': total}
+
+    def group_totals(self, table, by, start=None, end=None, where=None):
+        # {value of `by`: sum(Amount)} over the matching rows
+        if by not in TABLE_COLUMNS[table]:
+            raise ValueError(f"Unknown column '{by}' for table '{table}'")
+        with self._lock:
+            selected = self._select(table, start, end, where) if by in INDEXED_COLUMNS[table] else None
+            if selected is not None:
+                index, positions = selected
+                totals = index.group_totals(by, positions)
+            else:
+                sql, params = self._where_clause(table, start, end, where)
+                totals = dict(self._conn.execute(
+                    f"SELECT {by}, TOTAL(Amount) FROM {table}{sql} GROUP BY {by}", params).fetchall())
+        return {key: totals[key] for key in sorted(totals) if totals[key] > 0.005}
+
+    def insert(self, table, row):
+        with self._transaction() as conn:
+            return self._insert(conn, table, row)
+
+    def update(self, table, row_id, changes):
+        with self._transaction() as conn:
+            self._update(conn, table, row_id, changes)
+
+    def delete(self, table, row_id):
+        with self._transaction() as conn:
+            self._delete(conn, table, row_id)
+
+    def apply_changes(self, changes):
+        # changes: iterable of (table, row_id, values); values=None deletes the row.
+        # Everything is written in one transaction.
+        with self._transaction() as conn:
+            for table, row_id, values in changes:
+                if values is None:
+                    self._delete(conn, table, row_id)
+                else:
+                    self._update(conn, table, row_id, values)
+
+    def materialize_recurring(self, today=None):
+        # Post the recurring expenses due up to `today` (services/recurring.py)
+        # and advance their rules in the same transaction, so two processes
+        # never post the same month twice. Returns the number of rows posted.
+        with self._transaction() as conn:
+            found = conn.execute("SELECT value FROM settings WHERE key = 'recurring'").fetchone()
+            rows, rules = due_rows(json.loads(found[0]) if found else [], today)
+            for row in rows:
+                self._insert(conn, 'expenses', row)
+            if rows:
+                self._put_setting(conn, 'recurring', rules)
+        return len(rows)
+
+    # ----------- Bulk access -------------
+
+    def insert_many(self, table, df, skip_existing=True):
+        # Insert a DataFrame of normalized rows (all of the table's columns,
+        # Date as 'YYYY-MM-DD' text) in one transaction. With skip_existing,
+        # rows identical to one already in the table are dropped first.
+        # Returns the number of rows inserted.
+        cols = TABLE_COLUMNS[table]
+        df = df[cols].reset_index(drop=True)
+        marks = ', '.join('?' for _ in cols)
+        with self._transaction() as conn:
+            if skip_existing and not df.empty and conn.execute(
+                    f"SELECT 1 FROM {table} WHERE Date BETWEEN ? AND ? LIMIT 1",
+                    (df['Date'].min(), df['Date'].max())).fetchone():
+                staging = f"temp.import_{table}"
+                conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS import_{table} (pos INTEGER, {', '.join(cols)})")
+                conn.execute(f"DELETE FROM {staging}")
+                conn.executemany(f"INSERT INTO {staging} VALUES (?, {marks})",
+                                 df.reset_index().to_numpy(dtype=object).tolist())
+                # (Date, Amount) narrows each lookup to a row or two; without
+                # table statistics SQLite might pick the Category/Status index
+                same = ' AND '.join(f"t.{c} = s.{c}" for c in cols)
+                existing = {pos for (pos,) in conn.execute(
+                    f"SELECT s.pos FROM {staging} s WHERE EXISTS "
+                    f"(SELECT 1 FROM {table} t INDEXED BY idx_{table}_date_amount WHERE {same})")}
+                conn.execute(f"DELETE FROM {staging}")
+                if existing:
+                    df = df.drop(index=list(existing))
+            if df.empty:
+                return 0
+            self._touched.add(table)
+            conn.executemany(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({marks})",
+                             df.to_numpy(dtype=object).tolist())
+            # inside the write transaction the new ids are consecutive
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self._changes.append((table, last_id - len(df) + 1, df))
+            for name, amount in frame_contributions(table, df).items():
+                self._delta[name] = self._delta.get(name, 0.0) + amount
+        return len(df)
+
+    def iter_query(self, table, start=None, end=None, where=None, chunk_rows=50_000):
+        # Matching rows oldest first, as DataFrames of at most chunk_rows rows
+        # (Date left as text), all from one read transaction.
+        sql, params = self._where_clause(table, start, end, where)
+        with self._read_connection() as conn:
+            yield from pd.read_sql_query(f"SELECT {', '.join(TABLE_COLUMNS[table])} FROM {table}{sql} ORDER BY Date, id",
+                                         conn, params=params, chunksize=chunk_rows)
+
+    def _fetch_row(self, conn, table, row_id):
+        cur = conn.execute(f"SELECT * FROM {table} WHERE id = ?", (int(row_id),))
+        found = cur.fetchone()
+        if found is None:
+            return None
+        return dict(zip([d[0] for d in cur.description], found))
+
+    def _insert(self, conn, table, row):
+        clean = _clean_row(table, row)
+        cols = ', '.join(clean)
+        marks = ', '.join('?' for _ in clean)
+        cur = conn.execute(f"INSERT INTO {table} ({cols}) VALUES ({marks})", tuple(clean.values()))
+        self._track(table, new_row=self._fetch_row(conn, table, cur.lastrowid))
+        return cur.lastrowid
+
+    def _update(self, conn, table, row_id, changes):
+        clean = _clean_row(table, changes)
+        old_row = self._fetch_row(conn, table, row_id)
+        if not clean or old_row is None:
+            return
+        assignments = ', '.join(f"{col} = ?" for col in clean)
+        conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?", (*clean.values(), int(row_id)))
+        self._track(table, old_row, {**old_row, **clean})
+
+    def _delete(self, conn, table, row_id):
+        old_row = self._fetch_row(conn, table, row_id)
+        if old_row is None:
+            return
+        conn.execute(f"DELETE FROM {table} WHERE id = ?", (int(row_id),))
+        self._track(table, old_row=old_row)
+
+    # ----------- Aggregates -------------
+
+    def verify_aggregates(self, repair=False):
+        # Compare the running totals with a full recount.
+        # Returns {name: (stored, recomputed)} for every total that drifted.
+        with self._lock:
+            mismatches = self.aggregates.mismatches(recompute(self._conn))
+        if mismatches and repair:
+            self.rebuild_aggregates()
+        return mismatches
+
+    def refresh(self):
+        # Pick up writes made by other processes: reload the running totals
+        # and write counters once the stored counters have moved past ours.
+        # Returns True if anything changed.
+        with self._lock:
+            stored = dict(self._conn.execute("SELECT name, version FROM table_versions").fetchall())
+            if all(stored.get(table, 0) == version for table, version in self.versions.items()):
+                return False
+            self.aggregates = Aggregates.load(self._conn)
+            self.versions.update(stored)
+        return True
+
+    def rebuild_aggregates(self):
+        with self._transaction() as conn:
+            self.aggregates.replace(conn, recompute(conn))
+            self._put_setting(conn, 'aggregates_built', True)
+
+    # ----------- One-time import of the old CSV/JSON files -------------
+
+    def import_legacy(self, legacy_files):
+        # legacy_files: {'expenses': csv, 'savings': csv, 'categories': json, ...}
+        frames = {}
+        for table in TABLE_COLUMNS:
+            path = legacy_files.get(table)
+            if path and os.path.exists(path):
+                df = pd.read_csv(path)
+                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+                frames[table] = df[df['Date'].notna()].reindex(columns=TABLE_COLUMNS[table])
+
+        with self._transaction() as conn:
+            self._touched.update(frames)
+            for table, df in frames.items():
+                rows = [_clean_row(table, rec) for rec in df.to_dict('records')]
+                cols = TABLE_COLUMNS[table]
+                conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+                    [tuple(r[c] for c in cols) for r in rows],
+                )
+            for key in ('categories', 'subcategories', 'investment_types', 'balance'):
+                path = legacy_files.get(key)
+                if path and os.path.exists(path):
+                    with open(path, 'r') as f:
+                        self._put_setting(conn, key, json.load(f))
+            self._put_setting(conn, 'legacy_imported', True)
@@ -0,0 +1,315 @@
+# services/ledger_index.py
+# In-memory columnar index of a ledger table for filtered reads.
+#
+# Holds the row ids, dates (as day numbers), amounts and the label
+# columns as integer codes, plus, per label value, the sorted positions of
+# the rows carrying it. A filter such as Status='Pending' AND Category IN
+# (Food, Rent) is then a union of the value lists per column and an
+# intersection across columns, instead of string comparisons over every
+# row. The ledger applies each committed insert / update / delete to the
+# index, so it never has to be rebuilt while this process is the writer.
+#
+# Dates are bucketed by month: each month holds its rows' positions
+# sorted by (Date, position), i.e. by (Date, id). A date range is then a
+# binary search in the two edge months plus the whole months in between,
+# and a new row is inserted into its month only, never re-sorting the table.
+#
+# Deleted rows leave a tombstone (alive=False) until a quarter of the
+# positions are dead, or a new row is given a dead row's id again, then
+# the arrays are compacted.
+
+from bisect import bisect_left, bisect_right, insort
+
+import numpy as np
+import pandas as pd
+
+# label columns indexed per table
+INDEXED_COLUMNS = {
+    'expenses': ['Category', 'Subcategory', 'Status'],
+    'savings': ['InvestmentType'],
+}
+
+
+def day_number(value):
+    # 'YYYY-MM-DD' / date / Timestamp -> days since 1970-01-01
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
+
+
+def month_number(days):
+    # day number(s) -> months since 1970-01
+    return np.asarray(days, dtype='datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+class _Array:
+    # append-friendly numpy array (capacity doubles as it grows)
+    def __init__(self, values, dtype):
+        values = np.asarray(values, dtype=dtype)
+        self._data = np.empty(max(16, len(values) * 2), dtype=dtype)
+        self._data[:len(values)] = values
+        self.size = len(values)
+
+    @property
+    def values(self):
+        return self._data[:self.size]
+
+    def append(self, values):
+        values = np.atleast_1d(np.asarray(values, dtype=self._data.dtype))
+        if self.size + len(values) > len(self._data):
+            grown = np.empty(max(len(self._data) * 2, self.size + len(values)), dtype=self._data.dtype)
+            grown[:self.size] = self.values
+            self._data = grown
+        self._data[self.size:self.size + len(values)] = values
+        self.size += len(values)
+
+    def __setitem__(self, pos, value):
+        self._data[pos] = value
+
+
+class TableIndex:
+    def __init__(self, table, df, version):
+        # df: the table indexed by row id, label columns categorical (Ledger.load_table)
+        self.table = table
+        self.version = version
+        self.columns = INDEXED_COLUMNS[table]
+        df = df.sort_index()
+        self.ids = _Array(df.index.to_numpy(), np.int64)
+        self.days = _Array(df['Date'].to_numpy().astype('datetime64[D]').astype(np.int64), np.int64)
+        self.amounts = _Array(df['Amount'].to_numpy(), np.float64)
+        self.alive = _Array(np.ones(len(df), dtype=bool), bool)
+        self.labels = {}    # column -> [value, ...] (code = position)
+        self.codes = {}     # column -> value -> code
+        self.row_codes = {}  # column -> _Array of codes per position
+        self.groups = {}    # column -> code -> sorted positions
+        for col in self.columns:
+            cat = df[col].astype('category')
+            self.labels[col] = [str(v) for v in cat.cat.categories]
+            self.codes[col] = {v: i for i, v in enumerate(self.labels[col])}
+            codes = cat.cat.codes.to_numpy().astype(np.int32)
+            self.row_codes[col] = _Array(codes, np.int32)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(self.labels[col]) + 1))
+            self.groups[col] = {code: order[bounds[code]:bounds[code + 1]].astype(np.int64)
+                                for code in range(len(self.labels[col]))}
+        self._build_months()
+        self.dead = 0
+
+    def __len__(self):
+        return self.ids.size - self.dead
+
+    # ----------- Maintenance -------------
+
+    def _build_months(self):
+        # month -> live positions sorted by (Date, position); month_keys sorted
+        positions = np.flatnonzero(self.alive.values)
+        days = self.days.values[positions]
+        order = np.lexsort((positions, days))
+        positions, months = positions[order], month_number(days[order])
+        keys, bounds = np.unique(months, return_index=True)
+        bounds = list(bounds) + [len(positions)]
+        self.months = {int(key): positions[bounds[i]:bounds[i + 1]] for i, key in enumerate(keys)}
+        self.month_keys = [int(key) for key in keys]
+
+    def _slot(self, bucket, day, pos):
+        # where (day, pos) goes in a month bucket
+        days = self.days.values[bucket]
+        lo, hi = np.searchsorted(days, day, 'left'), np.searchsorted(days, day, 'right')
+        return int(lo + np.searchsorted(bucket[lo:hi], pos))
+
+    def _add_to_month(self, pos, day):
+        month = int(month_number(day))
+        bucket = self.months.get(month)
+        if bucket is None:
+            self.months[month] = np.array([pos], dtype=np.int64)
+            insort(self.month_keys, month)
+        else:
+            self.months[month] = np.insert(bucket, self._slot(bucket, day, pos), pos)
+
+    def _remove_from_month(self, pos, day):
+        # call before days[pos] changes
+        month = int(month_number(day))
+        bucket = np.delete(self.months[month], self._slot(self.months[month], day, pos))
+        if len(bucket):
+            self.months[month] = bucket
+        else:
+            del self.months[month]
+            self.month_keys.remove(month)
+
+    def _code(self, col, value):
+        code = self.codes[col].get(value)
+        if code is None:
+            code = self.codes[col][value] = len(self.labels[col])
+            self.labels[col].append(value)
+            self.groups[col][code] = np.empty(0, dtype=np.int64)
+        return code
+
+    def _position(self, row_id):
+        ids = self.ids.values
+        pos = int(np.searchsorted(ids, row_id))
+        if pos < len(ids) and ids[pos] == row_id and self.alive.values[pos]:
+            return pos
+        return None
+
+    def _before_insert(self, first_id):
+        # New rows get ids above every live row's, but SQLite (no
+        # AUTOINCREMENT) hands out the id of a deleted newest row again;
+        # compacting drops its tombstone, so positions stay sorted by id
+        # and every id is held once.
+        if self.ids.size and self.ids.values[-1] >= first_id:
+            self._compact()
+
+    def insert(self, row):
+        # row: stored values incl. 'id'
+        self._before_insert(row['id'])
+        pos = self.ids.size
+        day = day_number(row['Date'])
+        self.ids.append(row['id'])
+        self.days.append(day)
+        self._add_to_month(pos, day)
+        self.amounts.append(float(row['Amount']))
+        self.alive.append(True)
+        for col in self.columns:
+            code = self._code(col, row[col])
+            self.row_codes[col].append(code)
+            self.groups[col][code] = np.append(self.groups[col][code], pos)
+
+    def insert_many(self, first_id, df):
+        # df rows were given the consecutive ids first_id, first_id + 1, ...
+        self._before_insert(first_id)
+        start = self.ids.size
+        positions = np.arange(start, start + len(df), dtype=np.int64)
+        self.ids.append(np.arange(first_id, first_id + len(df), dtype=np.int64))
+        days = pd.to_datetime(df['Date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+        self.days.append(days)
+        self.amounts.append(df['Amount'].to_numpy(dtype=np.float64))
+        self.alive.append(np.ones(len(df), dtype=bool))
+        for col in self.columns:
+            uniques, inverse = np.unique(df[col].to_numpy(dtype=object), return_inverse=True)
+            codes = np.array([self._code(col, v) for v in uniques], dtype=np.int32)[inverse]
+            self.row_codes[col].append(codes)
+            for code in np.unique(codes):
+                self.groups[col][code] = np.concatenate([self.groups[col][code], positions[codes == code]])
+        # merge into the months the new rows fall in; other months are untouched
+        months = month_number(days)
+        for month in np.unique(months):
+            month = int(month)
+            bucket = np.concatenate([self.months.get(month, np.empty(0, np.int64)), positions[months == month]])
+            self.months[month] = bucket[np.lexsort((bucket, self.days.values[bucket]))]
+            if month not in self.month_keys:
+                insort(self.month_keys, month)
+
+    def update(self, row):
+        pos = self._position(row['id'])
+        if pos is None:
+            return
+        day = day_number(row['Date'])
+        if day != self.days.values[pos]:
+            self._remove_from_month(pos, self.days.values[pos])
+            self.days[pos] = day
+            self._add_to_month(pos, day)
+        self.amounts[pos] = float(row['Amount'])
+        for col in self.columns:
+            old, new = self.row_codes[col].values[pos], self._code(col, row[col])
+            if old != new:
+                self._move(col, pos, old, new)
+
+    def delete(self, row_id):
+        pos = self._position(row_id)
+        if pos is None:
+            return
+        self.alive[pos] = False
+        self._remove_from_month(pos, self.days.values[pos])
+        for col in self.columns:
+            group = self.groups[col][self.row_codes[col].values[pos]]
+            self.groups[col][self.row_codes[col].values[pos]] = np.delete(group, np.searchsorted(group, pos))
+        self.dead += 1
+        if self.dead * 4 > self.ids.size:
+            self._compact()
+
+    def _move(self, col, pos, old, new):
+        group = self.groups[col][old]
+        self.groups[col][old] = np.delete(group, np.searchsorted(group, pos))
+        group = self.groups[col][new]
+        self.groups[col][new] = np.insert(group, np.searchsorted(group, pos), pos)
+        self.row_codes[col][pos] = new
+
+    def _compact(self):
+        keep = self.alive.values
+        remap = np.cumsum(keep) - 1
+        for attr in ('ids', 'days', 'amounts'):
+            arr = getattr(self, attr)
+            setattr(self, attr, _Array(arr.values[keep], arr.values.dtype))
+        for col in self.columns:
+            self.row_codes[col] = _Array(self.row_codes[col].values[keep], np.int32)
+            self.groups[col] = {code: remap[group] for code, group in self.groups[col].items()}
+        self.months = {month: remap[bucket] for month, bucket in self.months.items()}
+        self.alive = _Array(np.ones(int(keep.sum()), dtype=bool), bool)
+        self.dead = 0
+
+    # ----------- Filters -------------
+
+    def date_range(self, start=None, end=None):
+        # live positions with start <= Date <= end, ordered by (Date, id)
+        lo = -np.inf if start is None else day_number(start)
+        hi = np.inf if end is None else day_number(end)
+        keys = self.month_keys
+        first = 0 if start is None else bisect_left(keys, int(month_number(lo)))
+        last = len(keys) if end is None else bisect_right(keys, int(month_number(hi)))
+        parts = []
+        for i in range(first, last):
+            bucket = self.months[keys[i]]
+            if i in (first, last - 1):
+                days = self.days.values[bucket]
+                bucket = bucket[np.searchsorted(days, lo, 'left'):np.searchsorted(days, hi, 'right')]
+            parts.append(bucket)
+        return np.concatenate(parts) if parts else np.empty(0, np.int64)
+
+    def select(self, start=None, end=None, where=None):
+        # positions of the live rows matching the filter: ascending with a
+        # label filter, ordered by (Date, id) without one
+        # where: {indexed column: value or list of values}; None / [] = no filter
+        matches = None
+        for col, val in (where or {}).items():
+            if val is None or (isinstance(val, (list, tuple, set)) and not val):
+                continue
+            values = val if isinstance(val, (list, tuple, set)) else [val]
+            codes = [self.codes[col][v] for v in values if v in self.codes[col]]
+            found = [self.groups[col][code] for code in codes]
+            found = np.unique(np.concatenate(found)) if len(found) > 1 else (found[0] if found else np.empty(0, np.int64))
+            matches = found if matches is None else np.intersect1d(matches, found, assume_unique=True)
+        if matches is None:
+            return self.date_range(start, end)
+        if start is not None or end is not None:
+            days = self.days.values[matches]
+            keep = np.ones(len(matches), dtype=bool)
+            if start is not None:
+                keep &= days >= day_number(start)
+            if end is not None:
+                keep &= days <= day_number(end)
+            matches = matches[keep]
+        return matches
+
+    def newest_first(self, positions, count=None):
+        # positions ordered by (Date, id) descending, the ledger's display
+        # order; with `count`, only the first `count` of them
+        days = self.days.values[positions]
+        if len(positions) > 1 and np.all(days[1:] >= days[:-1]) and np.all(
+                (days[1:] > days[:-1]) | (positions[1:] > positions[:-1])):
+            # already in (Date, id) order (an unfiltered date range)
+            return positions[::-1][:count]
+        key = (days << 32) | self.ids.values[positions]
+        if count is not None and count < len(positions):
+            top = np.argpartition(-key, count - 1)[:count]
+            return positions[top[np.argsort(-key[top])]]
+        return positions[np.argsort(-key)]
+
+    def row_ids(self, positions):
+        return self.ids.values[positions]
+
+    def total(self, positions):
+        return float(self.amounts.values[positions].sum())
+
+    def group_totals(self, col, positions):
+        # {label: sum(Amount)} over positions
+        sums = np.bincount(self.row_codes[col].values[positions], weights=self.amounts.values[positions],
+                           minlength=len(self.labels[col]))
+        return {self.labels[col][code]: float(amount) for code, amount in enumerate(sums)}
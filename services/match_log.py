@@ -0,0 +1,270 @@
+# services/match_log.py
+# Event-sourced volleyball matches for the Volleyball Score Tracker.
+#
+# Every match is an append-only log file: a one-line JSON header (teams,
+# start time) followed by one byte per event, b'1' / b'2' for a point to
+# team 1 / 2 and b'u' to undo the last point still in effect, so a full
+# five-set match is a few hundred bytes. The score is never recomputed
+# from the log: each event updates the live state in O(1), undo included,
+# and a log is only replayed when a match is first opened (or to pick up
+# events appended by another process).
+#
+# Rules: sets to 25 with a 2-point lead, a deciding fifth set to 15, best
+# of five. The team that won the last rally serves.
+#
+# MatchStore keeps all the matches of a tournament in one directory plus
+# a small index (teams, sets, winner) that is only rewritten when a match
+# starts or a set is decided, so listing many matches never opens a log.
+# Given a pubsub Channel, it publishes each match's live state (topic: the
+# match id) after every change, so viewer sessions follow a match by
+# polling a subscription instead of rereading it. Points scored by another
+# server process are picked up by sync(), at most every SYNC_EVERY seconds
+# per match however many viewers call it.
+
+import json
+import os
+import threading
+import time
+import uuid
+
+from services.profiler import count_bytes
+from services.write_coordinator import coordinator
+
+SETS_TO_WIN = 3
+SET_POINTS = 25
+DECIDING_SET_POINTS = 15
+MIN_LEAD = 2
+
+SYNC_EVERY = 1.0
+
+POINT_EVENTS = (b'1'[0], b'2'[0])
+UNDO_EVENT = b'u'[0]
+
+
+class Match:
+    def __init__(self, path, header, events=b'', offset=0):
+        # offset: where `events` start in the log (after the header)
+        self.path = path
+        self.id = header['id']
+        self.teams = header['teams']
+        self.started = header['started']
+        self.points = [0, 0]        # current set
+        self.sets = [0, 0]          # sets won
+        self.set_scores = []        # [(team 1, team 2)] of the finished sets
+        self.rallies = bytearray()  # team (0 / 1) of every point in effect
+        self.winner = None          # 0 / 1 once the match is decided
+        self.events = 0
+        self._offset = offset       # log bytes applied so far
+        self._lock = threading.Lock()
+        self._apply_events(events)
+
+    # ----------- State -------------
+
+    @property
+    def set_number(self):
+        return len(self.set_scores) + 1
+
+    @property
+    def set_target(self):
+        return DECIDING_SET_POINTS if self.set_number == 2 * SETS_TO_WIN - 1 else SET_POINTS
+
+    @property
+    def serving(self):
+        return self.rallies[-1] if self.rallies else 0
+
+    def _score(self, team):
+        # False once the match is over
+        if self.winner is not None:
+            return False
+        self.rallies.append(team)
+        self.points[team] += 1
+        mine, theirs = self.points[team], self.points[1 - team]
+        if mine >= self.set_target and mine - theirs >= MIN_LEAD:
+            self.set_scores.append(tuple(self.points))
+            self.sets[team] += 1
+            self.points = [0, 0]
+            if self.sets[team] == SETS_TO_WIN:
+                self.winner = team
+        return True
+
+    def _unscore(self):
+        if not self.rallies:
+            return False
+        team = self.rallies.pop()
+        if self.points == [0, 0]:
+            # that point decided the previous set (and maybe the match)
+            self.points = list(self.set_scores.pop())
+            self.sets[team] -= 1
+            self.winner = None
+        self.points[team] -= 1
+        return True
+
+    def _apply_events(self, events):
+        for event in events:
+            if event == UNDO_EVENT:
+                self._unscore()
+            else:
+                self._score(POINT_EVENTS.index(event))
+            self.events += 1
+        self._offset += len(events)
+
+    # ----------- Events -------------
+
+    def _catch_up(self):
+        # apply events another process appended since we last looked;
+        # whether there were any
+        size = os.path.getsize(self.path)
+        if size <= self._offset:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            events = f.read()
+        count_bytes(read=len(events))
+        self._apply_events(events)
+        return True
+
+    def _record(self, event, change):
+        # apply `change` and, if it did anything, append its event; returns
+        # whether the number of finished sets changed
+        with self._lock, coordinator.lock(self.path):
+            self._catch_up()
+            finished = len(self.set_scores)
+            if not change():
+                return None
+            with open(self.path, 'ab') as f:
+                f.write(bytes([event]))
+            count_bytes(written=1)
+            self.events += 1
+            self._offset += 1
+            return len(self.set_scores) != finished
+
+    def point(self, team):
+        # team: 0 or 1; None if the match is already over, else whether a set was decided
+        return self._record(POINT_EVENTS[team], lambda: self._score(team))
+
+    def undo(self):
+        # None if there is nothing to undo, else whether a set was un-decided
+        return self._record(UNDO_EVENT, self._unscore)
+
+    def refresh(self):
+        # whether events from another process were applied
+        with self._lock:
+            return self._catch_up()
+
+    def summary(self):
+        return {
+            'id': self.id, 'teams': list(self.teams), 'started': self.started,
+            'sets': list(self.sets), 'set_scores': [list(s) for s in self.set_scores],
+            'points': list(self.points), 'winner': self.winner,
+        }
+
+    def live_state(self):
+        # the fields a scoreboard shows (published to viewers)
+        with self._lock:
+            return {
+                'teams': tuple(self.teams), 'points': tuple(self.points), 'sets': tuple(self.sets),
+                'set_scores': tuple(self.set_scores), 'serving': self.serving, 'winner': self.winner,
+                'set_number': self.set_number, 'set_target': self.set_target, 'rallies': len(self.rallies),
+            }
+
+
+class MatchStore:
+    def __init__(self, data_dir, channel=None):
+        self.data_dir = data_dir
+        self.channel = channel
+        self.index_path = os.path.join(data_dir, 'index.json')
+        self._lock = threading.Lock()
+        self._open = {}   # match id -> Match
+        self._synced = {}  # match id -> time of the last sync()
+        self._publish_lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+
+    def _log_path(self, match_id):
+        return os.path.join(self.data_dir, f"{match_id}.log")
+
+    def create(self, team1, team2):
+        header = {'id': f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}",
+                  'teams': [team1, team2], 'started': time.time()}
+        path = self._log_path(header['id'])
+        line = json.dumps(header) + '\n'
+        coordinator.append_line(path, line.rstrip('\n'))
+        match = Match(path, header, offset=len(line.encode()))
+        with self._lock:
+            self._open[match.id] = match
+        self.update_index(match)
+        self.publish(match)
+        return match
+
+    def get(self, match_id):
+        # the open match, loaded from its log the first time; None if unknown
+        with self._lock:
+            match = self._open.get(match_id)
+            loaded = match is None
+            if loaded:
+                path = self._log_path(match_id)
+                if not os.path.exists(path):
+                    return None
+                with open(path, 'rb') as f:
+                    header = f.readline()
+                    events = f.read()
+                count_bytes(read=len(header) + len(events))
+                match = Match(path, json.loads(header), events, offset=len(header))
+                self._open[match_id] = match
+        if match.refresh() or loaded:
+            self.publish(match)
+        return match
+
+    def point(self, match, team):
+        decided = match.point(team)
+        if decided:
+            self.update_index(match)
+        if decided is not None:
+            self.publish(match)
+        return decided
+
+    def undo(self, match):
+        undecided = match.undo()
+        if undecided:
+            self.update_index(match)
+        if undecided is not None:
+            self.publish(match)
+        return undecided
+
+    def publish(self, match):
+        # changed fields of the match's live state ({} without a channel)
+        if self.channel is None:
+            return {}
+        with self._publish_lock:   # concurrent points publish in order
+            return self.channel.publish(match.id, match.live_state())
+
+    def sync(self, match_id):
+        # pick up (and publish) events another process appended
+        now = time.time()
+        if now - self._synced.get(match_id, 0) < SYNC_EVERY:
+            return
+        self._synced[match_id] = now
+        match = self._open.get(match_id)
+        if match is not None and match.refresh():
+            self.publish(match)
+
+    def subscribe(self, match_id):
+        # Subscription to a match's live state; its first poll returns the
+        # whole state
+        if self.channel.version(match_id) == 0:
+            self.get(match_id)
+        return self.channel.subscribe(match_id)
+
+    def update_index(self, match):
+        # called when a match starts or a set is decided / undone
+        summary = match.summary()
+        del summary['points']
+        coordinator.update_json(self.index_path, lambda index: {**index, match.id: summary}, {})
+
+    def matches(self):
+        # summaries of every match, newest first, read from the index only
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return []
+        return sorted(index.values(), key=lambda m: m['started'], reverse=True)
@@ -0,0 +1,174 @@
+# services/profiler.py
+# Rerun profiler shared by all the pages.
+#
+# Pages wrap their hot paths in named stages, either with
+#   with stage("render.table"): ...
+# or by decorating a loader/saver with @profiled("load"). Every finished
+# stage adds one record (page, stage, seconds, bytes read/written) to a
+# ring buffer and to running per-stage totals. The storage layer reports
+# file I/O with count_bytes(), which is charged to the innermost open
+# stage of the calling thread.
+#
+# The totals can be exported as Prometheus text and the raw records as
+# JSONL; profiler_panel() shows both, with download buttons, in the
+# sidebar when the page is opened with ?profile=1.
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+from itertools import count
+
+import streamlit as st
+
+RING_SIZE = 5000
+
+_lock = threading.Lock()
+_records = deque(maxlen=RING_SIZE)
+_totals = {}            # (page, stage) -> {'calls', 'seconds', 'max_s', 'bytes_read', 'bytes_written'}
+_seq = count(1)
+_runs = count(1)
+_local = threading.local()   # .page, .run and .stack of the script thread
+
+
+def begin_run(page):
+    # called by PageTimer at the top of every page run
+    _local.page = page
+    _local.run = next(_runs)
+    _local.stack = []
+
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def count_bytes(read=0, written=0):
+    # charge file I/O to the innermost open stage (ignored outside stages)
+    stack = _stack()
+    if stack:
+        stack[-1]['bytes_read'] += read
+        stack[-1]['bytes_written'] += written
+
+
+def record(page, name, seconds, bytes_read=0, bytes_written=0):
+    with _lock:
+        _records.append({
+            'seq': next(_seq), 'ts': time.time(), 'run': current_run(), 'page': page, 'stage': name,
+            'seconds': seconds, 'bytes_read': bytes_read, 'bytes_written': bytes_written,
+        })
+        total = _totals.setdefault((page, name), {
+            'calls': 0, 'seconds': 0.0, 'max_s': 0.0, 'bytes_read': 0, 'bytes_written': 0,
+        })
+        total['calls'] += 1
+        total['seconds'] += seconds
+        total['max_s'] = max(total['max_s'], seconds)
+        total['bytes_read'] += bytes_read
+        total['bytes_written'] += bytes_written
+
+
+class stage:
+    # context manager (and decorator via profiled) timing one named stage
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._frame = {'bytes_read': 0, 'bytes_written': 0}
+        _stack().append(self._frame)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self._started
+        stack = _stack()
+        stack.pop()
+        record(getattr(_local, 'page', None), self.name, seconds,
+               self._frame['bytes_read'], self._frame['bytes_written'])
+        return False
+
+
+def profiled(name):
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+# ----------- Reading & export -------------
+
+def records(since=0, page=None):
+    # ring buffer contents, oldest first; `since` is a record seq
+    with _lock:
+        return [dict(r) for r in _records if r['seq'] > since and (page is None or r['page'] == page)]
+
+
+def last_seq():
+    with _lock:
+        return _records[-1]['seq'] if _records else 0
+
+
+def totals(page=None):
+    # [{'page', 'stage', 'calls', 'seconds', 'max_s', 'bytes_read', 'bytes_written'}]
+    with _lock:
+        return [{'page': p, 'stage': s, **t} for (p, s), t in sorted(_totals.items(), key=lambda kv: str(kv[0]))
+                if page is None or p == page]
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+PROMETHEUS_METRICS = [
+    ('app_stage_calls_total', 'counter', 'calls', 'Number of times a page stage ran.'),
+    ('app_stage_seconds_total', 'counter', 'seconds', 'Time spent in a page stage.'),
+    ('app_stage_seconds_max', 'gauge', 'max_s', 'Slowest single run of a page stage.'),
+    ('app_stage_bytes_read_total', 'counter', 'bytes_read', 'File bytes read inside a page stage.'),
+    ('app_stage_bytes_written_total', 'counter', 'bytes_written', 'File bytes written inside a page stage.'),
+]
+
+
+def prometheus_text():
+    rows = totals()
+    lines = []
+    for metric, kind, field, help_text in PROMETHEUS_METRICS:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for row in rows:
+            lines.append(f'{metric}{{page="{_label(row["page"])}",stage="{_label(row["stage"])}"}} {row[field]}')
+    return '\n'.join(lines) + '\n'
+
+
+def jsonl_text(since=0):
+    return ''.join(json.dumps(r) + '\n' for r in records(since))
+
+# ----------- Sidebar panel -------------
+
+def profiler_panel(page):
+    # Per-stage timings for `page`: the last run and the totals so far.
+    # Hidden unless the URL has ?profile=1.
+    if st.query_params.get('profile') not in ('1', 'true'):
+        return
+    run = current_run()
+    last_run = [r for r in records(page=page) if r['run'] == run]
+    with st.sidebar.expander("🔬 Rerun profiler", expanded=True):
+        st.caption("Last run")
+        st.dataframe([{'stage': r['stage'], 'ms': round(r['seconds'] * 1000, 2),
+                       'read': r['bytes_read'], 'written': r['bytes_written']} for r in last_run],
+                     hide_index=True)
+        st.caption("Totals since start")
+        st.dataframe([{'stage': t['stage'], 'calls': t['calls'], 'total ms': round(t['seconds'] * 1000, 1),
+                       'max ms': round(t['max_s'] * 1000, 2), 'read': t['bytes_read'],
+                       'written': t['bytes_written']} for t in totals(page)],
+                     hide_index=True)
+        c1, c2 = st.columns(2)
+        c1.download_button("Prometheus", prometheus_text(), file_name="metrics.txt", mime="text/plain")
+        c2.download_button("JSONL", jsonl_text(), file_name="profile.jsonl", mime="application/jsonl")
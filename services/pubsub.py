@@ -0,0 +1,121 @@
+# services/pubsub.py
+# Process-wide publish / subscribe for live state shared between sessions.
+#
+# A topic (e.g. one volleyball match) has a current state: a flat dict of
+# fields. A publisher sends the whole new state; the channel keeps only the
+# fields that changed, stamps them with the topic's next version and keeps
+# the last BACKLOG of those deltas. A subscriber remembers the version it
+# has seen, so poll() is one integer comparison when nothing happened and
+# otherwise returns just the fields that changed since (merged over the
+# deltas it missed, or the whole state if it fell further behind than the
+# backlog). Nothing is pushed to or stored per subscriber, so a publish
+# costs the same for one viewer or a thousand.
+#
+# Subscribers report each poll, which gives a live viewer count per topic
+# (a subscriber that has not polled for IDLE_AFTER seconds is not counted).
+
+import threading
+import time
+from collections import deque
+
+BACKLOG = 64
+IDLE_AFTER = 30.0
+
+_MISSING = object()
+
+
+class _Topic:
+    def __init__(self):
+        self.version = 0
+        self.state = {}
+        self.deltas = deque(maxlen=BACKLOG)   # (version, {field: value})
+        self.seen = {}                        # subscriber id -> last poll time
+
+
+class Channel:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._topics = {}
+        self._next_id = 0
+
+    def _topic(self, topic):
+        t = self._topics.get(topic)
+        if t is None:
+            t = self._topics[topic] = _Topic()
+        return t
+
+    def publish(self, topic, state):
+        # returns the fields that changed ({} if none; nothing is published then)
+        with self._lock:
+            t = self._topic(topic)
+            changes = {k: v for k, v in state.items() if t.state.get(k, _MISSING) != v}
+            if changes:
+                t.version += 1
+                t.state = {**t.state, **changes}
+                t.deltas.append((t.version, changes))
+            return changes
+
+    def version(self, topic):
+        t = self._topics.get(topic)
+        return t.version if t is not None else 0
+
+    def state(self, topic):
+        with self._lock:
+            return dict(self._topic(topic).state)
+
+    def subscribe(self, topic):
+        with self._lock:
+            self._next_id += 1
+            return Subscription(self, topic, self._next_id)
+
+    def _changes_since(self, topic, since, sub_id):
+        # (version, changed fields) after `since`; the no-change case only
+        # reads the version, without taking the lock
+        t = self._topics.get(topic)
+        if t is not None:
+            t.seen[sub_id] = time.time()
+            if t.version == since:
+                return since, None
+        with self._lock:
+            t = self._topic(topic)
+            t.seen[sub_id] = time.time()
+            if t.version == since:
+                return since, None
+            if not t.deltas or t.deltas[0][0] > since + 1:
+                changes = dict(t.state)   # fell behind the backlog (or new)
+            else:
+                changes = {}
+                for version, delta in t.deltas:
+                    if version > since:
+                        changes.update(delta)
+            return t.version, changes
+
+    def viewers(self, topic):
+        cutoff = time.time() - IDLE_AFTER
+        with self._lock:
+            t = self._topics.get(topic)
+            if t is None:
+                return 0
+            for sub_id in [s for s, at in list(t.seen.items()) if at < cutoff]:
+                del t.seen[sub_id]
+            return len(t.seen)
+
+
+class Subscription:
+    def __init__(self, channel, topic, sub_id):
+        self.channel = channel
+        self.topic = topic
+        self.id = sub_id
+        self.version = 0
+
+    def poll(self):
+        # changed fields since the last poll, None if nothing changed
+        version, changes = self.channel._changes_since(self.topic, self.version, self.id)
+        self.version = version
+        return changes
+
+    def close(self):
+        with self.channel._lock:
+            t = self.channel._topics.get(self.topic)
+            if t is not None:
+                t.seen.pop(self.id, None)
@@ -0,0 +1,62 @@
+# services/recurring.py
+# Recurring expenses (rent, subscriptions, ...) for the Financial Dashboard.
+#
+# A rule is stored in the ledger's 'recurring' setting as
+#   {'id', 'Category', 'Subcategory', 'Amount', 'Notes', 'day', 'start', 'through'}
+# and posts one Pending expense per month on `day` (the last day of
+# shorter months), starting in the month of `start`. `through` is the last
+# month ('YYYY-MM') already posted, so a rule is never posted twice for the
+# same month even if the scheduler was down for a while: missed months are
+# caught up on its next run. Ledger.materialize_recurring applies due_rows()
+# in one transaction.
+
+import uuid
+
+import pandas as pd
+
+
+def new_rule(category, amount, day, start, subcategory='', notes=''):
+    return {
+        'id': uuid.uuid4().hex[:8], 'Category': category, 'Subcategory': subcategory or '',
+        'Amount': float(amount), 'Notes': notes or '', 'day': int(day),
+        'start': pd.Timestamp(start).strftime('%Y-%m-%d'), 'through': None,
+    }
+
+
+def _occurrence(month, day):
+    # the rule's date in `month` (a Period)
+    return month.to_timestamp().replace(day=min(day, month.days_in_month))
+
+
+def due_rows(rules, today=None):
+    # (expense rows that have fallen due up to `today`, rules with `through` advanced)
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    rows, updated = [], []
+    for rule in rules:
+        start = pd.Timestamp(rule['start'])
+        month = start.to_period('M')
+        if rule.get('through'):
+            month = max(month, pd.Period(rule['through'], 'M') + 1)
+        rule = dict(rule)
+        while month <= today.to_period('M'):
+            date = _occurrence(month, rule['day'])
+            if date > today:
+                break
+            if date >= start:
+                rows.append({
+                    'Date': date, 'Category': rule['Category'], 'Subcategory': rule['Subcategory'],
+                    'Amount': rule['Amount'], 'Notes': rule['Notes'] or 'Recurring', 'Status': 'Pending',
+                })
+            rule['through'] = str(month)
+            month += 1
+        updated.append(rule)
+    return rows, updated
+
+
+def next_date(rule, today=None):
+    # date of the rule's next posting after `today`
+    today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+    month = pd.Period(rule['through'], 'M') + 1 if rule.get('through') else pd.Timestamp(rule['start']).to_period('M')
+    while _occurrence(month, rule['day']) <= today or _occurrence(month, rule['day']) < pd.Timestamp(rule['start']):
+        month += 1
+    return _occurrence(month, rule['day'])
@@ -0,0 +1,154 @@
+# services/scheduler.py
+# Background job runner for work that should not happen inside a rerun.
+#
+# One daemon thread per server process runs the jobs that are due, oldest
+# due time first. A job is a function run every `interval` seconds; pages
+# register their jobs on every run (registering an existing key is a
+# no-op) and can trigger one to run as soon as possible, e.g. after a
+# write made its result stale. The last return value of each job is kept,
+# so pages read ready-made results instead of computing them.
+#
+# Run times go to the profiler under the page "scheduler" (and so to its
+# Prometheus / JSONL export); queue_depth() and stats() feed the sidebar
+# panel.
+
+import heapq
+import threading
+import time
+import traceback
+from itertools import count
+
+from services.profiler import record
+
+PROFILER_PAGE = 'scheduler'
+
+
+class JobGone(Exception):
+    # raised by a job whose target no longer exists; the job is dropped
+    pass
+
+
+class Scheduler:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []       # (due, seq, key); stale entries are skipped
+        self._seq = count()
+        self._jobs = {}       # key -> job dict
+        self._results = {}    # key -> last return value
+        self._running = None  # key of the job being run
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+                self._thread.start()
+        return self
+
+    # ----------- Jobs -------------
+
+    def schedule(self, key, func, interval, kind=None, owner=None, delay=0.0):
+        # Run func() now + delay and then every `interval` seconds. A key that
+        # is already scheduled for the same `owner` (e.g. an open ledger's
+        # cache_token) keeps its job; a new owner replaces it.
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is not None and job['owner'] == owner:
+                return
+            self._jobs[key] = job = {
+                'key': key, 'kind': kind or key, 'func': func, 'owner': owner, 'interval': interval, 'due': None,
+                'runs': 0, 'errors': 0, 'last_s': None, 'total_s': 0.0, 'max_s': 0.0,
+                'last_run': None, 'last_error': None, 'again': False,
+            }
+            self._push(job, time.time() + delay)
+
+    def trigger(self, key):
+        # run `key` as soon as the worker is free (once more if it is running now)
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is None:
+                return
+            if self._running == key:
+                job['again'] = True
+            elif job['due'] > time.time():
+                self._push(job, time.time())
+
+    def unschedule(self, key):
+        with self._cond:
+            self._jobs.pop(key, None)
+            self._results.pop(key, None)
+
+    def _push(self, job, due):
+        job['due'] = due
+        heapq.heappush(self._heap, (due, next(self._seq), job['key']))
+        self._cond.notify()
+
+    def result(self, key, default=None):
+        with self._cond:
+            return self._results.get(key, default)
+
+    # ----------- Worker -------------
+
+    def _next_job(self):
+        # block until a job is due; returns it
+        with self._cond:
+            while True:
+                while self._heap:
+                    due, _, key = self._heap[0]
+                    job = self._jobs.get(key)
+                    if job is None or job['due'] != due:   # unscheduled or rescheduled
+                        heapq.heappop(self._heap)
+                        continue
+                    break
+                if self._heap and self._heap[0][0] <= time.time():
+                    heapq.heappop(self._heap)
+                    self._running = job['key']
+                    return job
+                self._cond.wait(self._heap[0][0] - time.time() if self._heap else None)
+
+    def _loop(self):
+        while True:
+            job = self._next_job()
+            started = time.perf_counter()
+            error = None
+            try:
+                value = job['func']()
+            except JobGone:
+                self.unschedule(job['key'])
+                with self._cond:
+                    self._running = None
+                continue
+            except Exception:
+                error = traceback.format_exc(limit=3)
+            seconds = time.perf_counter() - started
+            record(PROFILER_PAGE, job['kind'], seconds)
+            with self._cond:
+                self._running = None
+                job['runs'] += 1
+                job['last_s'] = seconds
+                job['total_s'] += seconds
+                job['max_s'] = max(job['max_s'], seconds)
+                job['last_run'] = time.time()
+                if error is None:
+                    self._results[job['key']] = value
+                else:
+                    job['errors'] += 1
+                    job['last_error'] = error
+                if self._jobs.get(job['key']) is job:
+                    self._push(job, time.time() + (0 if job['again'] else job['interval']))
+                job['again'] = False
+
+    # ----------- Metrics -------------
+
+    def queue_depth(self):
+        # jobs due now and waiting for the worker (plus the one running)
+        now = time.time()
+        with self._cond:
+            waiting = sum(1 for job in self._jobs.values() if job['due'] <= now and job['key'] != self._running)
+            return waiting + (self._running is not None)
+
+    def stats(self):
+        # [{'key', 'kind', 'runs', 'errors', 'last_s', 'total_s', 'max_s', 'last_run', 'next_run', 'last_error'}]
+        with self._cond:
+            return [{**{k: v for k, v in job.items() if k not in ('func', 'owner', 'due', 'interval', 'again')}, 'next_run': job['due']}
+                    for job in sorted(self._jobs.values(), key=lambda j: j['key'])]
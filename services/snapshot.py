@@ -0,0 +1,98 @@
+# services/snapshot.py
+# Columnar snapshots of the finance ledger tables.
+#
+# Whole-table reads come from an Arrow IPC file with a fixed, typed
+# schema instead of parsing rows out of SQLite: Date is a timestamp,
+# Amount a float64, and the repeated labels (Category, Subcategory,
+# Status, InvestmentType) are dictionary encoded, so they load straight
+# into pandas categoricals. Files are uncompressed and memory-mapped;
+# a load only touches the columns it asks for and needs no type coercion.
+#
+# The file records the ledger version it was written at; the ledger
+# rewrites it when the table has changed since (see Ledger.load_table).
+
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # whole-table reads fall back to SQLite
+    pa = None
+
+SNAPSHOTS_AVAILABLE = pa is not None
+
+DICTIONARY = 'dictionary'
+
+# column -> arrow type ('dictionary' = dictionary<int32, string>)
+SNAPSHOT_COLUMNS = {
+    'expenses': {
+        'id': 'int64', 'Date': 'timestamp', 'Category': DICTIONARY, 'Subcategory': DICTIONARY,
+        'Amount': 'float64', 'Notes': 'string', 'Status': DICTIONARY,
+    },
+    'savings': {
+        'id': 'int64', 'Date': 'timestamp', 'InvestmentType': DICTIONARY, 'Amount': 'float64',
+        'City': 'string', 'Area': 'string', 'Notes': 'string',
+    },
+}
+
+_ARROW_TYPES = {
+    'int64': lambda: pa.int64(),
+    'float64': lambda: pa.float64(),
+    'string': lambda: pa.string(),
+    'timestamp': lambda: pa.timestamp('ms'),
+    DICTIONARY: lambda: pa.dictionary(pa.int32(), pa.string()),
+}
+
+
+def snapshot_schema(table, version):
+    fields = [pa.field(col, _ARROW_TYPES[kind]()) for col, kind in SNAPSHOT_COLUMNS[table].items()]
+    return pa.schema(fields, metadata={'version': str(version)})
+
+
+def dictionary_columns(table):
+    return [col for col, kind in SNAPSHOT_COLUMNS[table].items() if kind == DICTIONARY]
+
+
+def snapshot_version(path):
+    # ledger version the snapshot at `path` was written at, None if missing
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except pa.ArrowInvalid:  # torn / foreign file
+        return None
+    version = metadata.get(b'version')
+    return int(version) if version is not None else None
+
+
+def write_snapshot(f, table, chunks, labels, version, date_format):
+    # Stream DataFrame `chunks` (rows as stored in SQLite) into `f`.
+    # labels: {dictionary column: every value it holds}, so all batches
+    # share one dictionary, as the IPC file format requires.
+    schema = snapshot_schema(table, version)
+    dictionaries = {col: pa.array(values, pa.string()) for col, values in labels.items()}
+    with pa.ipc.new_file(f, schema) as writer:
+        for chunk in chunks:
+            arrays = []
+            for field in schema:
+                values = chunk[field.name]
+                if field.name in dictionaries:
+                    codes = pd.Categorical(values, categories=labels[field.name]).codes
+                    arrays.append(pa.DictionaryArray.from_arrays(pa.array(codes, pa.int32()), dictionaries[field.name]))
+                elif field.name == 'Date':
+                    arrays.append(pa.array(pd.to_datetime(values, format=date_format), field.type))
+                else:
+                    arrays.append(pa.array(values, field.type, from_pandas=True))
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+
+
+def read_snapshot(path, columns=None):
+    # DataFrame indexed by row id; only `columns` are read from the mapped file
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(['id'] + [c for c in columns if c != 'id'])
+        df = table.to_pandas()
+    return df.set_index('id')
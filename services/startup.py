@@ -0,0 +1,110 @@
+# services/startup.py
+# Cold-start helpers shared by the landing page and every page.
+#
+# warm_up() imports the heavy libraries once per server process in a
+# background thread, so the first page a visitor opens does not pay for
+# them. lazy_import() defers a module until a page actually uses it, and
+# PageTimer records per-page import and render timings so cold-start
+# regressions show up on the landing page.
+
+import importlib
+import threading
+import time
+import types
+
+from services import profiler
+
+# libraries most pages end up needing
+WARM_UP_MODULES = ['pandas', 'numpy', 'plotly.express', 'altair']
+
+_lock = threading.Lock()
+_warm_up_started = False
+_timings = {}   # page -> stats, see PageTimer.done
+
+
+def warm_up(modules=WARM_UP_MODULES):
+    # start importing `modules` in the background (once per process)
+    global _warm_up_started
+    with _lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+
+    def run():
+        for name in modules:
+            started = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                continue
+            _record_import('(warm-up)', name, time.perf_counter() - started)
+
+    threading.Thread(target=run, name='warm-up', daemon=True).start()
+
+
+def _record_import(page, module, seconds):
+    with _lock:
+        stats = _timings.setdefault(page, {'imports': {}})
+        stats['imports'].setdefault(module, seconds)
+
+
+class _LazyModule(types.ModuleType):
+    def __init__(self, name, page):
+        super().__init__(name)
+        self._lazy_page = page
+        self._lazy_module = None
+
+    def __getattr__(self, attr):
+        if self._lazy_module is None:
+            started = time.perf_counter()
+            self._lazy_module = importlib.import_module(self.__name__)
+            _record_import(self._lazy_page, self.__name__, time.perf_counter() - started)
+        return getattr(self._lazy_module, attr)
+
+
+def lazy_import(name, page):
+    # module proxy that imports `name` on first attribute access
+    return _LazyModule(name, page)
+
+
+class PageTimer:
+    # timer = PageTimer("page"); ...; timer.mark("imports"); ...; timer.done()
+    # Each marked phase is also recorded as a profiler stage (with the file
+    # I/O done in it), and the whole run as the 'rerun' stage.
+    def __init__(self, page):
+        self.page = page
+        profiler.begin_run(page)
+        self.started = time.perf_counter()
+        self._last = self.started
+        self._segment = profiler.stage(None).__enter__()
+        self.phases = {}
+
+    def _end_phase(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+        self._segment.name = phase
+        self._segment.__exit__(None, None, None)
+
+    def mark(self, phase):
+        self._end_phase(phase)
+        self._segment = profiler.stage(None).__enter__()
+
+    def done(self, phase='render'):
+        # the part of the run after the last mark is recorded as `phase`
+        self._end_phase(phase)
+        total = time.perf_counter() - self.started
+        profiler.record(self.page, 'rerun', total)
+        with _lock:
+            stats = _timings.setdefault(self.page, {'imports': {}})
+            if 'first_render_s' not in stats:
+                stats['first_render_s'] = total
+                stats['first_render_phases'] = dict(self.phases)
+            stats['last_render_s'] = total
+            stats['renders'] = stats.get('renders', 0) + 1
+
+
+def startup_timings():
+    # {page: {'imports': {module: s}, 'first_render_s', 'last_render_s', 'renders', ...}}
+    with _lock:
+        return {page: {**stats, 'imports': dict(stats['imports'])} for page, stats in _timings.items()}
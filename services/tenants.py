@@ -0,0 +1,90 @@
+# services/tenants.py
+# Per-user data isolation for the Financial Dashboard and Health Tracker.
+#
+# Each tenant (a logged-in user, or the ?user= query parameter when no
+# authentication is configured) gets its own data directory, so a rerun
+# only ever reads that user's data. Open stores are kept in a small LRU
+# registry: a tenant's store is created lazily on first use, and stores
+# that are idle or pushed out by newer tenants are dropped from memory
+# (their files stay on disk).
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+# Tenant used when no user is known; it keeps the original file locations.
+DEFAULT_TENANT = 'default'
+
+
+def _auth_configured():
+    # an [auth] section in secrets.toml enables st.login / st.user
+    try:
+        return 'auth' in st.secrets
+    except Exception:  # no secrets file
+        return False
+
+
+def _tenant_id(user):
+    # safe directory name; the hash keeps e.g. 'a@b' and 'a_b' apart
+    slug = re.sub(r'[^A-Za-z0-9_.-]', '_', user)[:40]
+    return f"{slug}-{hashlib.sha1(user.encode()).hexdigest()[:8]}"
+
+
+def current_tenant():
+    # With authentication configured only the logged-in user counts, so
+    # ?user= cannot open someone else's data. Otherwise ?user= picks a
+    # tenant in its own namespace ('q-' hashed in), which never equals a
+    # logged-in user's tenant.
+    if _auth_configured():
+        if st.user.is_logged_in:
+            user = st.user.get('email') or st.user.get('name')
+            if user:
+                return _tenant_id(user)
+        return DEFAULT_TENANT
+    user = st.query_params.get('user')
+    if not user:
+        return DEFAULT_TENANT
+    return _tenant_id(f"q-{user}")
+
+
+def tenant_dir(base_dir, tenant):
+    # DEFAULT_TENANT lives directly in base_dir, others under base_dir/tenants/
+    if tenant == DEFAULT_TENANT:
+        return base_dir
+    path = os.path.join(base_dir, 'tenants', tenant)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class TenantRegistry:
+    def __init__(self, factory, capacity=32, idle_seconds=1800):
+        self.factory = factory
+        self.capacity = capacity
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        self._stores = OrderedDict()  # tenant -> (store, last used)
+
+    def get(self, tenant):
+        now = time.monotonic()
+        with self._lock:
+            if tenant in self._stores:
+                store, _ = self._stores.pop(tenant)
+            else:
+                store = self.factory(tenant)
+            self._stores[tenant] = (store, now)
+            self._evict(now)
+        return store
+
+    def _evict(self, now):
+        # oldest first: idle tenants, then anything over capacity
+        while self._stores:
+            tenant, (_, last_used) = next(iter(self._stores.items()))
+            if len(self._stores) > self.capacity or now - last_used > self.idle_seconds:
+                del self._stores[tenant]
+            else:
+                break
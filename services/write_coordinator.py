@@ -0,0 +1,112 @@
+# services/write_coordinator.py
+# Serializes writers per file for all the pages.
+#
+# Each file gets its own lock: a threading lock for the sessions inside
+# this server process, plus an fcntl lock on ".locks/<file>.lock" next to
+# it when several processes share the data directory. Whole-file writes
+# go to a temp file that is renamed over the target, so readers never see
+# a truncated file. Time spent waiting for a lock is recorded per file.
+
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from services.profiler import count_bytes
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+
+class WriteCoordinator:
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+        self._stats = {}
+
+    def _thread_lock(self, path):
+        with self._guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def record_wait(self, name, seconds):
+        with self._guard:
+            stat = self._stats.setdefault(name, {'writes': 0, 'wait_total_s': 0.0, 'wait_max_s': 0.0})
+            stat['writes'] += 1
+            stat['wait_total_s'] += seconds
+            stat['wait_max_s'] = max(stat['wait_max_s'], seconds)
+
+    def metrics(self):
+        # [{'file', 'writes', 'wait_total_s', 'wait_max_s'}] for every file written so far
+        with self._guard:
+            return [{'file': name, **stat} for name, stat in sorted(self._stats.items())]
+
+    @contextmanager
+    def lock(self, path):
+        path = os.path.abspath(path)
+        started = time.perf_counter()
+        with self._thread_lock(path):
+            lock_file = None
+            if fcntl is not None:
+                lock_dir = os.path.join(os.path.dirname(path), '.locks')
+                os.makedirs(lock_dir, exist_ok=True)
+                lock_file = open(os.path.join(lock_dir, os.path.basename(path) + '.lock'), 'a')
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self.record_wait(path, time.perf_counter() - started)
+            try:
+                yield
+            finally:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                    lock_file.close()
+
+    # ----------- Writes -------------
+
+    def _replace(self, path, write, mode='w'):
+        # write(f) into a temp file next to `path`, then rename it into place
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+                count_bytes(written=f.tell())
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def write_json(self, path, data, **dump_kwargs):
+        with self.lock(path):
+            self._replace(path, lambda f: json.dump(data, f, **dump_kwargs))
+
+    def write_stream(self, path, write):
+        # write(f) streams into a binary temp file that replaces `path`;
+        # the caller holds self.lock(path)
+        self._replace(path, write, mode='wb')
+
+    def update_json(self, path, update, default):
+        # Read-modify-write under the file lock, so concurrent updates
+        # (e.g. two sessions adding an item to the same list) are merged.
+        with self.lock(path):
+            data = default
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                    count_bytes(read=f.tell())
+            data = update(data)
+            self._replace(path, lambda f: json.dump(data, f, indent=2))
+        return data
+
+    def append_line(self, path, line):
+        with self.lock(path):
+            with open(path, 'a') as f:
+                f.write(line + '\n')
+            count_bytes(written=len(line.encode()) + 1)
+
+
+# one coordinator per server process
+coordinator = WriteCoordinator()
@@ -0,0 +1,129 @@
+# services/zodiac.py
+# Zodiac signs and daily horoscopes for the Horoscope page.
+#
+# Signs come from a table with one entry per day of a leap year (366),
+# built once per process: a lookup is a day-of-year index into it, and
+# sign_codes() does the same for a whole column of birthdates with numpy.
+# numpy / pandas are only imported by the batch functions, so a single
+# lookup does not pay for them.
+#
+# Each sign has a small pool of messages; the message of the day rotates
+# with the date. daily_horoscopes(day) builds the 12 messages of a day
+# once (memoized), so a bulk request costs one array index per row.
+
+import functools
+from datetime import date
+
+# (sign, first day (month, day)), in calendar order from January
+SIGNS = [
+    ("Capricorn", (1, 1)),
+    ("Aquarius", (1, 20)),
+    ("Pisces", (2, 19)),
+    ("Aries", (3, 21)),
+    ("Taurus", (4, 20)),
+    ("Gemini", (5, 21)),
+    ("Cancer", (6, 21)),
+    ("Leo", (7, 23)),
+    ("Virgo", (8, 23)),
+    ("Libra", (9, 23)),
+    ("Scorpio", (10, 23)),
+    ("Sagittarius", (11, 22)),
+    ("Capricorn", (12, 22)),
+]
+SIGN_NAMES = [sign for sign, _ in SIGNS[:-1]]
+DAYS_IN_MONTH = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+# day of (a leap) year of the 1st of each month, 0-based
+MONTH_OFFSETS = [sum(DAYS_IN_MONTH[:m]) for m in range(12)]
+
+
+def _build_table():
+    table = bytearray(366)
+    starts = [MONTH_OFFSETS[m - 1] + d - 1 for _, (m, d) in SIGNS] + [366]
+    for i, (sign, _) in enumerate(SIGNS):
+        table[starts[i]:starts[i + 1]] = bytes([SIGN_NAMES.index(sign)]) * (starts[i + 1] - starts[i])
+    return bytes(table)
+
+
+SIGN_TABLE = _build_table()   # day of year -> index into SIGN_NAMES
+
+# ----------- Lookups -------------
+
+def is_valid(month, day):
+    return 1 <= month <= 12 and 1 <= day <= DAYS_IN_MONTH[month - 1]
+
+
+def zodiac_sign(month, day):
+    # sign name, None for an impossible date (Feb 29 counts as valid)
+    if not is_valid(month, day):
+        return None
+    return SIGN_NAMES[SIGN_TABLE[MONTH_OFFSETS[month - 1] + day - 1]]
+
+
+def sign_codes(birthdates):
+    # numpy array: index into SIGN_NAMES per birthdate, -1 where it is not a date
+    import numpy as np
+    import pandas as pd
+    dates = pd.to_datetime(pd.Series(birthdates), errors='coerce')
+    valid = dates.notna().to_numpy()
+    codes = np.full(len(dates), -1, dtype=np.int8)
+    months = dates.dt.month.to_numpy()[valid].astype(np.int64)
+    days = dates.dt.day.to_numpy()[valid].astype(np.int64)
+    table = np.frombuffer(SIGN_TABLE, dtype=np.int8)
+    codes[valid] = table[np.asarray(MONTH_OFFSETS)[months - 1] + days - 1]
+    return codes
+
+# ----------- Horoscopes -------------
+
+MESSAGES = {
+    "Aries": ["Today is a great day to start something new!", "Lead the way; others are ready to follow.",
+              "Channel your energy into one bold move."],
+    "Taurus": ["Patience will reward you today.", "Comfort and good food recharge you tonight.",
+               "A steady pace wins an unexpected race."],
+    "Gemini": ["Communication is your strength — use it wisely.", "A chance conversation sparks a new idea.",
+               "Say yes to two plans; you can manage both."],
+    "Cancer": ["Take time to care for yourself today.", "Home is where today's good news arrives.",
+               "Someone close needs your listening ear."],
+    "Leo": ["Confidence will open unexpected doors.", "Your generosity comes back to you twice.",
+            "Step into the spotlight — it's yours."],
+    "Virgo": ["Your attention to detail will pay off.", "A tidy plan makes a messy day easy.",
+              "Help offered today is help returned soon."],
+    "Libra": ["Balance is key — find your center.", "Beauty finds you in an ordinary moment.",
+              "A fair compromise pleases everyone."],
+    "Scorpio": ["An exciting opportunity is coming your way.", "Trust deepens when you share a secret.",
+                "Your focus turns a problem into a win."],
+    "Sagittarius": ["Adventure awaits — say yes!", "A new place or idea broadens your view.",
+                    "Laughter is your best compass today."],
+    "Capricorn": ["Hard work today will lead to great rewards.", "A long-term goal moves a step closer.",
+                  "Structure brings you unexpected freedom."],
+    "Aquarius": ["Think outside the box for creative solutions.", "Your friends inspire your next big idea.",
+                 "An unusual choice turns out right."],
+    "Pisces": ["Trust your intuition; it won’t let you down.", "A creative outlet lifts your mood.",
+               "Dreams hold a useful hint tonight."],
+}
+DEFAULT_MESSAGE = "Today holds surprises for you."
+
+
+@functools.lru_cache(maxsize=8)
+def daily_horoscopes(day):
+    # the day's message per sign code, plus DEFAULT_MESSAGE at index -1
+    # (for rows that are not dates)
+    rotation = date.fromisoformat(day).toordinal()
+    messages = [MESSAGES[sign][(rotation + i) % len(MESSAGES[sign])] for i, sign in enumerate(SIGN_NAMES)]
+    return tuple(messages + [DEFAULT_MESSAGE])
+
+
+@functools.lru_cache(maxsize=8)
+def _daily_array(day):
+    import numpy as np
+    return np.array(daily_horoscopes(day), dtype=object)
+
+
+def horoscope(sign, day=None):
+    if sign not in SIGN_NAMES:
+        return DEFAULT_MESSAGE
+    return daily_horoscopes(str(day or date.today()))[SIGN_NAMES.index(sign)]
+
+
+def horoscopes(codes, day=None):
+    # numpy array of the day's message per sign code (from sign_codes)
+    return _daily_array(str(day or date.today()))[codes]
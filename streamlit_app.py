@@ -3,6 +3,11 @@
 
 import streamlit as st
 
+from services.startup import startup_timings, warm_up
+
+# start importing pandas/plotly/altair in the background while the
+# visitor is still on the landing page
+warm_up()
 
 st.set_page_config(
     page_title="Multipage App",
@@ -40,3 +45,18 @@ st.markdown(
     "<h3 style='text-align:center;'>✅ Check out the <em>side&nbsp;menu</em> to see all the pages.</h3>",
     unsafe_allow_html=True,
 )
+
+# Per-page cold-start timings for this server process
+timings = startup_timings()
+if timings:
+    with st.expander("⏱️ Startup timings"):
+        st.dataframe([
+            {
+                "page": page,
+                "first render (s)": round(stats.get("first_render_s", 0), 3),
+                "last render (s)": round(stats.get("last_render_s", 0), 3),
+                "renders": stats.get("renders", 0),
+                "imports": ", ".join(f"{mod} {sec:.2f}s" for mod, sec in stats["imports"].items()),
+            }
+            for page, stats in timings.items()
+        ])
@@ -0,0 +1,197 @@
+# tests/test_ledger_index.py
+# The in-memory table index (services/ledger_index.py) against SQL.
+#
+# The ledger applies every committed write to its index instead of
+# rebuilding it, so after each step the index must select exactly the rows
+# a plain SQL / pandas filter over the table finds, in the same order.
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.ledger import Ledger, TABLE_COLUMNS
+
+CATEGORIES = ['Food', 'Rent', 'Travel', 'Bills']
+STATUSES = ['Paid', 'Pending']
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = Ledger(str(tmp_path / 'ledger.db'))
+    yield ledger
+    ledger.close()
+
+
+def random_row(rng):
+    return {
+        'Date': f"2024-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}",
+        'Category': rng.choice(CATEGORIES),
+        'Subcategory': rng.choice(['', 'a', 'b']),
+        'Amount': rng.randint(1, 500) / 4,
+        'Notes': '',
+        'Status': rng.choice(STATUSES),
+    }
+
+
+def random_frame(rng, count):
+    # distinct Notes so insert_many never skips a row as already stored
+    rows = [{**random_row(rng), 'Notes': f"bulk {rng.random()}"} for _ in range(count)]
+    return pd.DataFrame(rows, columns=TABLE_COLUMNS['expenses'])
+
+
+def sql_rows(ledger):
+    df = pd.read_sql_query("SELECT * FROM expenses", ledger._conn)
+    return df.sort_values(['Date', 'id'])
+
+
+def index_ids(index, start=None, end=None, where=None):
+    return index.row_ids(index.select(start, end, where)).tolist()
+
+
+def expected_ids(df, start=None, end=None, where=None):
+    keep = pd.Series(True, index=df.index)
+    if start is not None:
+        keep &= df['Date'] >= start
+    if end is not None:
+        keep &= df['Date'] <= end
+    for col, val in (where or {}).items():
+        keep &= df[col].isin(val if isinstance(val, list) else [val])
+    return df.loc[keep, 'id'].tolist()
+
+
+def check(ledger, index, rng):
+    # the ledger kept the same index object (no rebuild) and it matches SQL
+    assert ledger._indexes['expenses'] is index
+    df = sql_rows(ledger)
+    assert len(index) == len(df)
+    # date ranges come back ordered by (Date, id)
+    assert index_ids(index) == df['id'].tolist()
+    for _ in range(5):
+        start = f"2024-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}"
+        end = f"2024-{rng.randint(1, 6):02d}-{rng.randint(1, 28):02d}"
+        assert index_ids(index, start, end) == expected_ids(df, start, end)
+    # label filters come back by position, i.e. by id
+    for where in ({'Status': 'Pending'}, {'Category': ['Food', 'Rent']},
+                  {'Category': 'Travel', 'Status': 'Paid'}, {'Subcategory': 'a'}):
+        start = rng.choice([None, '2024-02-10'])
+        assert index_ids(index, start, None, where) == sorted(expected_ids(df, start, None, where))
+        positions = index.select(start, None, where)
+        assert index.total(positions) == pytest.approx(
+            df.loc[df['id'].isin(expected_ids(df, start, None, where)), 'Amount'].sum())
+    assert index.group_totals('Category', index.select()) == pytest.approx(
+        {cat: df.loc[df['Category'] == cat, 'Amount'].sum() for cat in index.labels['Category']})
+
+
+def test_random_writes_match_sql(ledger):
+    rng = random.Random(7)
+    ledger.insert_many('expenses', random_frame(rng, 200))
+    index = ledger._index('expenses')
+    for step in range(300):
+        ids = sql_rows(ledger)['id'].tolist()
+        op = rng.random()
+        if op < 0.3 or not ids:
+            ledger.insert('expenses', random_row(rng))
+        elif op < 0.35:
+            ledger.insert_many('expenses', random_frame(rng, rng.randint(1, 30)))
+        elif op < 0.7:
+            changes = {col: val for col, val in random_row(rng).items() if rng.random() < 0.5}
+            ledger.update('expenses', rng.choice(ids), changes)
+        elif op < 0.9:
+            ledger.delete('expenses', rng.choice(ids))
+        else:
+            ledger.apply_changes([('expenses', row_id, None if rng.random() < 0.5 else random_row(rng))
+                                  for row_id in rng.sample(ids, min(3, len(ids)))])
+        if step % 10 == 0:
+            check(ledger, index, rng)
+    check(ledger, index, rng)
+
+
+def test_deletes_leave_tombstones_until_compacted(ledger):
+    rng = random.Random(1)
+    ledger.insert_many('expenses', random_frame(rng, 40))
+    index = ledger._index('expenses')
+    ids = sorted(sql_rows(ledger)['id'])
+
+    for row_id in ids[:10]:
+        ledger.delete('expenses', row_id)
+    # a quarter of the positions are dead: not compacted yet
+    assert index.dead == 10 and index.ids.size == 40
+    assert not index.alive.values[:10].any()
+    assert len(index) == 30
+    check(ledger, index, rng)
+
+    ledger.delete('expenses', ids[10])
+    assert index.dead == 0 and index.ids.size == 29
+    assert index.alive.values.all()
+    check(ledger, index, rng)
+
+    # a deleted id is no longer found, and updating it is a no-op
+    assert index._position(ids[0]) is None
+    index.update({**random_row(rng), 'id': ids[0]})
+    check(ledger, index, rng)
+
+
+def test_reused_id_of_deleted_newest_row(ledger):
+    # without AUTOINCREMENT SQLite gives a new row the id of a deleted
+    # newest row again; the index must track the new row, not the tombstone
+    rng = random.Random(2)
+    ledger.insert_many('expenses', random_frame(rng, 10).assign(Status='Pending'))
+    index = ledger._index('expenses')
+    newest = int(sql_rows(ledger)['id'].max())
+
+    ledger.delete('expenses', newest)
+    assert ledger.insert('expenses', {**random_row(rng), 'Status': 'Pending'}) == newest
+    ledger.update('expenses', newest, {'Status': 'Paid'})
+    assert ledger.count('expenses', where={'Status': 'Pending'}) == 9
+    assert newest not in ledger.query('expenses', where={'Status': 'Pending'}).index
+    check(ledger, index, rng)
+
+    ledger.delete('expenses', newest)
+    assert ledger.count('expenses') == 9
+    assert ledger.summary('expenses')['total'] == pytest.approx(sql_rows(ledger)['Amount'].sum())
+    check(ledger, index, rng)
+
+    # the same through insert_many
+    ledger.insert_many('expenses', random_frame(rng, 3))
+    check(ledger, index, rng)
+
+
+def test_month_buckets_follow_date_changes(ledger):
+    rng = random.Random(3)
+    row_id = ledger.insert('expenses', {**random_row(rng), 'Date': '2024-01-15'})
+    other = ledger.insert('expenses', {**random_row(rng), 'Date': '2024-01-15'})
+    index = ledger._index('expenses')
+    january, march = 648, 650   # months since 1970-01
+    assert index.month_keys == [january]
+
+    ledger.update('expenses', row_id, {'Date': '2024-03-01'})
+    assert index.month_keys == [january, march]
+    assert index.row_ids(index.months[march]).tolist() == [row_id]
+    check(ledger, index, rng)
+
+    # the emptied month bucket goes away
+    ledger.delete('expenses', other)
+    assert index.month_keys == [march]
+    assert index_ids(index, '2024-01-01', '2024-02-28') == []
+    assert index_ids(index, '2024-02-01', '2024-03-01') == [row_id]
+
+    # same-day rows are kept in id order within their bucket
+    ledger.insert_many('expenses', random_frame(rng, 5).assign(Date='2024-03-01'))
+    ids = index.row_ids(index.months[march]).tolist()
+    assert ids == sorted(ids)
+    check(ledger, index, rng)
+
+
+def test_newest_first_matches_display_order(ledger):
+    rng = random.Random(5)
+    ledger.insert_many('expenses', random_frame(rng, 120))
+    index = ledger._index('expenses')
+    df = sql_rows(ledger).sort_values(['Date', 'id'], ascending=False)
+    for where in (None, {'Status': 'Paid'}):
+        positions = index.select(None, None, where)
+        expected = df if where is None else df[df['Status'] == 'Paid']
+        assert index.row_ids(index.newest_first(positions)).tolist() == expected['id'].tolist()
+        assert index.row_ids(index.newest_first(positions, 7)).tolist() == expected['id'].tolist()[:7]
+    assert np.array_equal(ledger.query('expenses', limit=10).index.to_numpy(), df['id'].to_numpy()[:10])
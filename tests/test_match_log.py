@@ -0,0 +1,132 @@
+# tests/test_match_log.py
+# Volleyball rules and undo of the event-sourced match log
+# (services/match_log.py): the live state kept event by event must equal
+# what replaying the log from scratch gives.
+
+import random
+
+import pytest
+
+from services.match_log import MatchStore
+from services.pubsub import Channel
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MatchStore(str(tmp_path / 'matches'))
+
+
+def score(store, match, *teams):
+    for team in teams:
+        store.point(match, team)
+
+
+def win_set(store, match, team):
+    score(store, match, *[team] * match.set_target)
+
+
+def state(match):
+    return (list(match.points), list(match.sets), list(match.set_scores), bytes(match.rallies), match.winner)
+
+
+def replayed(store, match):
+    # the match as a fresh store rebuilds it from its log
+    return MatchStore(store.data_dir).get(match.id)
+
+
+def test_set_needs_25_points_and_a_two_point_lead(store):
+    match = store.create('A', 'B')
+    score(store, match, *[0, 1] * 24)
+    assert match.points == [24, 24]
+    assert store.point(match, 0) is False        # 25-24: no lead yet
+    assert store.point(match, 1) is False        # 25-25
+    assert store.point(match, 0) is False        # 26-25
+    assert store.point(match, 0) is True         # 27-25
+    assert match.set_scores == [(27, 25)]
+    assert match.points == [0, 0] and match.sets == [1, 0]
+
+
+def test_fifth_set_to_15_and_best_of_five(store):
+    match = store.create('A', 'B')
+    for team in (0, 1, 0, 1):
+        win_set(store, match, team)
+    assert match.sets == [2, 2] and match.set_number == 5 and match.set_target == 15
+    score(store, match, *[1] * 14)
+    assert match.winner is None
+    assert store.point(match, 1) is True
+    assert match.winner == 1 and match.set_scores[-1] == (0, 15)
+    # nothing is scored (or logged) once the match is decided
+    events = match.events
+    assert store.point(match, 0) is None
+    assert match.events == events and match.points == [0, 0]
+    assert store.matches()[0]['winner'] == 1
+
+
+def test_undo_across_a_set_boundary(store):
+    match = store.create('A', 'B')
+    score(store, match, *[0] * 24, 1)
+    before = state(match)
+    assert store.point(match, 0) is True         # 25-1 decides the set
+    assert store.undo(match) is True             # and undoing it reopens it
+    assert state(match) == before
+    assert match.sets == [0, 0] and match.points == [24, 1]
+    assert store.matches()[0]['sets'] == [0, 0]
+    # the last rally's team serves
+    assert match.serving == 1
+
+
+def test_undo_reopens_a_decided_match(store):
+    match = store.create('A', 'B')
+    for _ in range(3):
+        win_set(store, match, 0)
+    assert match.winner == 0
+    assert store.undo(match) is True
+    assert match.winner is None and match.sets == [2, 0] and match.points == [24, 0]
+    assert store.point(match, 0) is True and match.winner == 0
+
+
+def test_undo_with_nothing_to_undo(store):
+    match = store.create('A', 'B')
+    assert store.undo(match) is None
+    assert match.events == 0
+    store.point(match, 1)
+    store.undo(match)
+    assert store.undo(match) is None
+    assert state(match) == state(store.create('C', 'D'))
+
+
+def test_random_events_replay_to_the_same_state(store):
+    rng = random.Random(11)
+    match = store.create('A', 'B')
+    for _ in range(600):
+        if rng.random() < 0.15:
+            store.undo(match)
+        else:
+            store.point(match, int(rng.random() < 0.55))
+        if rng.random() < 0.05:
+            assert state(replayed(store, match)) == state(match)
+    assert state(replayed(store, match)) == state(match)
+
+
+def test_other_process_events_are_picked_up(store):
+    match = store.create('A', 'B')
+    other = replayed(store, match)   # a second server process
+    score(store, other, 0, 0, 1)
+    store.undo(other)
+    assert match.refresh() is True
+    assert state(match) == state(other)
+    assert match.refresh() is False
+
+
+def test_viewers_get_only_the_changed_fields(tmp_path):
+    store = MatchStore(str(tmp_path / 'matches'), Channel())
+    match = store.create('A', 'B')
+    sub = store.subscribe(match.id)
+    assert sub.poll() == match.live_state()
+    assert sub.poll() is None
+    store.point(match, 1)
+    assert sub.poll() == {'points': (0, 1), 'serving': 1, 'rallies': 1}
+    # the deltas missed between two polls are merged, latest value kept
+    store.undo(match)
+    store.point(match, 0)
+    assert sub.poll() == {'points': (1, 0), 'serving': 0, 'rallies': 1}